@@ -0,0 +1,96 @@
+"""Export registry models to ONNX and prebuild their TensorRT engines.
+
+Usage:
+    python export_tensorrt.py                 # all models in registry.json
+    python export_tensorrt.py rn50adkp --fp16 # one model, FP16 engine
+
+Writes models/<model_name>.onnx with a fixed input shape (fixed shapes give
+TensorRT its best kernels) and builds the engine once so it lands in the engine
+cache. load_model_from_checkpoint() only uses the exported model on GPU nodes
+when LEGLENGTH_TENSORRT=1 is set (with LEGLENGTH_TENSORRT_PRECISION=fp16 for an
+FP16 engine); otherwise it runs the PyTorch model.
+"""
+
+import argparse
+import json
+import os
+import torch
+from typing import Optional
+
+from leglength.model_loader import load_model_from_checkpoint
+from leglength.tensorrt_detector import TensorRTKeypointDetector, get_onnx_path
+
+# ImageProcessor pads and resizes every image to a 512x512 square
+INPUT_SHAPE = (3, 512, 512)
+
+
+def export_onnx(model_name: str, onnx_path: Optional[str] = None) -> str:
+    """Trace a registry model to ONNX with a fixed input shape.
+    
+    Writes to models/<model_name>.onnx (where the loader looks for it) unless
+    ``onnx_path`` is given.
+    """
+    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    # A fresh eager model: a compiled backbone cannot be exported, and the cached
+    # loader would hand back the TensorRT detector once the ONNX file exists
+    detector = load_model_from_checkpoint(model_name, device, compile=False)
+    model = detector.model
+    if hasattr(model, 'fasterrcnn'):
+        # The keypoint offsets are unused at inference; export the detector itself
+        model = model.fasterrcnn
+    model.eval()
+    
+    onnx_path = onnx_path or get_onnx_path(model_name)
+    dummy = torch.rand(*INPUT_SHAPE, device=device)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            ([dummy],),
+            onnx_path,
+            opset_version=17,
+            input_names=['input'],
+            output_names=['boxes', 'labels', 'scores'],
+            dynamic_axes={
+                'boxes': {0: 'num_detections'},
+                'labels': {0: 'num_detections'},
+                'scores': {0: 'num_detections'},
+            },
+            do_constant_folding=True
+        )
+    print(f"✅ Exported {model_name} to {onnx_path}")
+    return onnx_path
+
+
+def build_engine(onnx_path: str, precision: str) -> None:
+    """Build the TensorRT engine once so it is cached next to the ONNX file."""
+    detector = TensorRTKeypointDetector(onnx_path, precision=precision)
+    detector.predict(torch.rand(*INPUT_SHAPE))
+    print(f"✅ Built {precision} TensorRT engine for {onnx_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export models to ONNX/TensorRT')
+    parser.add_argument('models', nargs='*', help='Model names from registry.json (default: all)')
+    parser.add_argument('--fp16', action='store_true',
+                        help='Build an FP16 engine (also runs the box decoding in FP16; default: FP32)')
+    parser.add_argument('--onnx-only', action='store_true', help='Skip building the TensorRT engine')
+    args = parser.parse_args()
+    
+    models = args.models
+    if not models:
+        registry_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'registry.json')
+        with open(registry_path, 'r') as f:
+            models = list(json.load(f).keys())
+    
+    precision = 'fp16' if args.fp16 else 'fp32'
+    for model_name in models:
+        try:
+            onnx_path = export_onnx(model_name)
+            if not args.onnx_only:
+                build_engine(onnx_path, precision)
+        except Exception as e:
+            print(f"❌ Failed to export {model_name}: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,24 +8,91 @@ from torchvision.ops import MultiScaleRoIAlign
 import logging
 import os
 import json
+import contextlib
+import functools
+import tempfile
 from typing import Dict, List, Tuple, Optional
 import numpy as np
 import torch.nn as nn
 import torch.nn.functional as F
 
+from .model_loader import KP_SUFFIXES
+from .training_models import (
+    CudaGraphCache, _best_per_class_indices, _compile_backbone, _forward_fasterrcnn, _uncompile_backbone
+)
+
 logger = logging.getLogger(__name__)
 
+@functools.lru_cache(maxsize=1)
+def _load_registry_cached(registry_path: str, mtime: float) -> dict:
+    """Parse registry.json; the mtime argument invalidates the cache when the file changes."""
+    with open(registry_path, 'r') as f:
+        return json.load(f)
+
+
+@contextlib.contextmanager
+def _eager_backbone(backbone: nn.Module):
+    """Run ``backbone`` without its torch.compile wrapper, e.g. for ONNX export."""
+    compiled_call_impl = getattr(backbone, '_compiled_call_impl', None)
+    backbone._compiled_call_impl = None
+    try:
+        yield backbone
+    finally:
+        backbone._compiled_call_impl = compiled_call_impl
+
+
+def _to_device(image: torch.Tensor, device: torch.device) -> torch.Tensor:
+    """Copy an image to ``device``, through pinned memory when going host-to-CUDA."""
+    if image.device.type == 'cpu' and device.type == 'cuda':
+        image = image.pin_memory()
+    return image.to(device, non_blocking=True)
+
+
+def _postprocess_predictions(predictions: Dict[str, torch.Tensor], confidence_threshold: float,
+                             best_per_class: bool) -> Dict[str, np.ndarray]:
+    """Filter one image's raw detections and convert them to NumPy arrays."""
+    # Filter predictions by confidence (on device)
+    keep = predictions['scores'] > confidence_threshold
+    boxes = predictions['boxes'][keep]
+    scores = predictions['scores'][keep]
+    labels = predictions['labels'][keep]
+    
+    if best_per_class:
+        logger.info(f"Best per class set to TRUE, getting best predictions")
+        best_indices = _best_per_class_indices(labels, scores)
+        boxes, scores, labels = boxes[best_indices], scores[best_indices], labels[best_indices]
+    
+    # Copy only the final, filtered tensors back to the host
+    boxes, scores, labels = (t.cpu().numpy() for t in (boxes.float(), scores.float(), labels))
+    return {
+        'boxes': boxes,
+        'scores': scores,
+        'labels': labels
+    }
+
+
 class LegLengthDetector:
     """Detector for leg length measurements using Faster R-CNN."""
     
-    def __init__(self, backbone_name='resnext101_32x8d', num_classes=9, weights='DEFAULT'):
+    # Convolutional backbones that run faster in NHWC (channels_last) layout;
+    # ViT/Swin work on token layouts and are left as is
+    CHANNELS_LAST_BACKBONES = {
+        "resnet50", "resnet101", "resnext101_32x8d", "densenet201", "efficientnet_v2_m",
+        "mobilenet_v3_large", "convnext_base", "convnext_small"
+    }
+    
+    def __init__(self, backbone_name='resnext101_32x8d', num_classes=9, weights=None, compile: bool = True):
         """
         Initialize the leg length detector.
         
         Args:
             backbone_name: Name of the backbone model to use
             num_classes: Number of classes to detect (default: 9 for 8 landmarks + background)
-            weights: Pre-trained weights to use ('DEFAULT', 'IMAGENET1K_V1', or None)
+            weights: Torchvision pre-trained weights to initialize from ('DEFAULT',
+                'IMAGENET1K_V1'). None (default) skips the download and load, since a
+                checkpoint is loaded over them anyway
+            compile: If True and CUDA is available, torch.compile the backbone; call
+                warmup() once the checkpoint weights are loaded to trigger compilation
         """
         self.backbone_name = backbone_name
         self.num_classes = num_classes
@@ -34,12 +101,24 @@ class LegLengthDetector:
         
         self.model = self._create_model()
         self.model.to(self.device)
+        
+        # Compilation is lazy; warmup() runs the first (compiling) forward
+        self.compiled = compile and self.device.type == 'cuda' and _compile_backbone(self.model, backbone_name)
+        
+        # Backbone CUDA graphs per input shape, captured lazily in predict(); not
+        # needed when the compiled backbone replays its own
+        self.use_cuda_graphs = self.device.type == 'cuda' and not self.compiled
+        self._cuda_graphs = CudaGraphCache()
+        
+        # ONNX Runtime session, set by optimize_for_inference()
+        self._ort_session = None
     
     @staticmethod
-    def _create_model_architecture(backbone_name: str, num_classes: int, weights='DEFAULT'):
+    def _create_model_architecture(backbone_name: str, num_classes: int, weights=None):
         """Create Faster R-CNN model architecture with specified backbone.
         
         This is a static method that can be called without instantiating the class.
+        Torchvision weights are only downloaded and loaded when ``weights`` is given.
         """
         # Common anchor generator and ROI pooler for all models
         anchor_generator = AnchorGenerator(
@@ -97,6 +176,9 @@ class LegLengthDetector:
                     self.original_pos_embed = vit_model.encoder.pos_embedding
                     num_patches = self.original_pos_embed.shape[1] - 1
                     self.original_grid_size = int(num_patches ** 0.5)
+                    
+                    # Interpolated positional embeddings per (H, W) patch grid, eval only
+                    self._cached_pos_embed: Dict[Tuple[int, int], torch.Tensor] = {}
                 
                 def interpolate_pos_encoding(self, pos_embed, H, W):
                     N = pos_embed.shape[1] - 1
@@ -124,7 +206,13 @@ class LegLengthDetector:
                     class_token = self.original_pos_embed[:, :1].expand(B, -1, -1)
                     x = torch.cat([class_token, x], dim=1)
                     
-                    pos_embed = self.interpolate_pos_encoding(self.original_pos_embed, H, W)
+                    if self.training:
+                        pos_embed = self.interpolate_pos_encoding(self.original_pos_embed, H, W)
+                    else:
+                        pos_embed = self._cached_pos_embed.get((H, W))
+                        if pos_embed is None or pos_embed.device != x.device:
+                            pos_embed = self.interpolate_pos_encoding(self.original_pos_embed, H, W).detach()
+                            self._cached_pos_embed[(H, W)] = pos_embed
                     x = x + pos_embed
                     x = self.encoder.dropout(x)
                     
@@ -218,6 +306,11 @@ class LegLengthDetector:
         else:
             raise ValueError(f"Backbone '{backbone_name}' is not supported. Supported backbones: resnet50, resnet101, resnext101_32x8d, densenet201, vit_l_16, efficientnet_v2_m, mobilenet_v3_large, swin_v2_b, convnext_base, convnext_small")
         
+        # Convs pick NHWC kernels when their weights are channels_last, even though
+        # the batched input built by model.transform is contiguous NCHW
+        if backbone_name in LegLengthDetector.CHANNELS_LAST_BACKBONES:
+            model.backbone.to(memory_format=torch.channels_last)
+        
         return model
     
     def _create_model(self):
@@ -228,14 +321,30 @@ class LegLengthDetector:
             self.weights
         )
     
+    def warmup(self) -> None:
+        """Trigger backbone compilation with a dummy forward.
+        
+        Call once the checkpoint weights are loaded, so the CUDA graphs recorded
+        by torch.compile read the final parameters.
+        """
+        if self.compiled:
+            try:
+                self.predict(torch.zeros(3, 800, 800, device=self.device))
+                logger.info(f"Compiled {self.backbone_name} backbone with torch.compile")
+            except Exception as e:
+                # Fall back to the eager backbone with manually captured CUDA graphs
+                _uncompile_backbone(self.model)
+                self.compiled = False
+                self.use_cuda_graphs = self.device.type == 'cuda'
+                logger.warning(f"torch.compile failed for {self.backbone_name}, using eager backbone: {e}")
+    
     @staticmethod
     def _get_registry() -> dict:
         """Get the model registry from registry.json."""
         current_dir = os.path.dirname(os.path.abspath(__file__))
         # Look for registry.json in the project root (parent directory of leglength module)
         registry_path = os.path.join(os.path.dirname(current_dir), 'registry.json')
-        with open(registry_path, 'r') as f:
-            return json.load(f)
+        return _load_registry_cached(registry_path, os.path.getmtime(registry_path))
     
     @staticmethod
     def _extract_backbone_name(model_name: str) -> str:
@@ -247,9 +356,8 @@ class LegLengthDetector:
             'vit_l_16' -> 'vit_l_16'
         """
         # Remove common suffixes
-        suffixes = ['_kp_head', '_keypoint_head', '_kphead']
         base_name = model_name
-        for suffix in suffixes:
+        for suffix in KP_SUFFIXES:
             if base_name.endswith(suffix):
                 base_name = base_name[:-len(suffix)]
                 break
@@ -268,9 +376,7 @@ class LegLengthDetector:
         current_dir = os.path.dirname(os.path.abspath(__file__))
         
         # Load registry from project root
-        registry_path = os.path.join(os.path.dirname(current_dir), 'registry.json')
-        with open(registry_path, 'r') as f:
-            registry = json.load(f)
+        registry = LegLengthDetector._get_registry()
         
         if model_name not in registry:
             raise ValueError(f"Model '{model_name}' not found in registry. Available models: {list(registry.keys())}")
@@ -286,7 +392,8 @@ class LegLengthDetector:
         return model_path
     
     @staticmethod
-    def load_checkpoint(model_name: str, device: Optional[torch.device] = None):
+    def load_checkpoint(model_name: str, device: Optional[torch.device] = None, checkpoint: Optional[dict] = None,
+                        lazy: bool = False):
         """Load model from checkpoint with automatic detection of model type.
         
         Supports all 5 model architectures from training code:
@@ -299,6 +406,8 @@ class LegLengthDetector:
         Args:
             model_name: Name of the model in registry.json (e.g., 'resnet50_kp_head', 'vit_l_16')
             device: Device to load model on (default: cuda if available, else cpu)
+            checkpoint: Already deserialized checkpoint to use instead of reading the file
+            lazy: Build on the meta device and assign memory-mapped weights (lower peak RAM)
             
         Returns:
             Model instance (type depends on checkpoint metadata)
@@ -309,47 +418,124 @@ class LegLengthDetector:
             device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         
         # Use unified model loader
-        model = load_model_from_checkpoint(model_name, device)
+        model = load_model_from_checkpoint(model_name, device, checkpoint, lazy)
         
         return model
     
-    @torch.no_grad()
-    def predict(self, image: torch.Tensor, confidence_threshold: float = 0.0, best_per_class: bool = True) -> Dict:
-        """Run inference on a single image."""
+    def optimize_for_inference(self, backend: str = 'onnxruntime', input_size: Tuple[int, int] = (800, 800),
+                               onnx_path: Optional[str] = None):
+        """Export the model to ONNX once and run predict() through ONNX Runtime.
+        
+        Args:
+            backend: 'onnxruntime' (CUDA/CPU execution providers) or 'tensorrt'
+                (TensorRT execution provider, falling back to CUDA/CPU)
+            input_size: (H, W) of the dummy image used for tracing; H and W are
+                exported as dynamic axes so other sizes still work
+            onnx_path: Where to write the .onnx file (default: temp directory)
+            
+        Returns:
+            The onnxruntime.InferenceSession used by predict()
+        """
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("onnxruntime is required for optimize_for_inference(); "
+                              "install onnxruntime or onnxruntime-gpu") from e
+        
+        if backend not in ('onnxruntime', 'tensorrt'):
+            raise ValueError(f"Unsupported backend '{backend}'. Supported backends: onnxruntime, tensorrt")
+        
+        if onnx_path is None:
+            onnx_path = os.path.join(tempfile.gettempdir(), f"leglength_{self.backbone_name}.onnx")
+        
         self.model.eval()
-        image = image.to(self.device)
+        dummy = torch.rand(3, *input_size, device=self.device)
+        # The exporter cannot trace a Dynamo-compiled backbone, so export the eager module
+        with torch.no_grad(), _eager_backbone(self.model.backbone):
+            torch.onnx.export(
+                self.model,
+                ([dummy],),
+                onnx_path,
+                opset_version=17,
+                input_names=['input'],
+                output_names=['boxes', 'labels', 'scores'],
+                dynamic_axes={
+                    'input': {1: 'H', 2: 'W'},
+                    'boxes': {0: 'num_detections'},
+                    'labels': {0: 'num_detections'},
+                    'scores': {0: 'num_detections'},
+                },
+                do_constant_folding=True
+            )
+        logger.info(f"Exported {self.backbone_name} model to ONNX: {onnx_path}")
         
-        # Get predictions
-        predictions = self.model([image])[0]
-        
-        # Filter predictions by confidence
-        keep = predictions['scores'] > confidence_threshold
-        filtered_preds = {
-            'boxes': predictions['boxes'][keep].cpu().numpy(),
-            'scores': predictions['scores'][keep].cpu().numpy(),
-            'labels': predictions['labels'][keep].cpu().numpy()
+        providers = ['CUDAExecutionProvider', 'CPUExecutionProvider']
+        if backend == 'tensorrt':
+            providers.insert(0, 'TensorrtExecutionProvider')
+        available = ort.get_available_providers()
+        providers = [p for p in providers if p in available]
+        
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self._ort_session = ort.InferenceSession(onnx_path, sess_options=options, providers=providers)
+        logger.info(f"ONNX Runtime session ready with providers: {self._ort_session.get_providers()}")
+        
+        return self._ort_session
+    
+    def _forward(self, images: List[torch.Tensor], dtype: Optional[torch.dtype] = None) -> List[Dict[str, torch.Tensor]]:
+        """Run the model on images already on the device, replaying backbone CUDA graphs on CUDA.
+        
+        Only the backbone runs under autocast with ``dtype``; the RPN and ROI heads
+        decode boxes in FP32 (see _forward_fasterrcnn).
+        """
+        graph_cache = self._cuda_graphs if self.use_cuda_graphs and images[0].is_cuda else None
+        return _forward_fasterrcnn(self.model, images, dtype, graph_cache)
+    
+    def _run_onnx(self, image: torch.Tensor) -> Dict[str, torch.Tensor]:
+        """Run the exported ONNX model on a single image."""
+        boxes, labels, scores = self._ort_session.run(None, {'input': image.cpu().numpy()})
+        return {
+            'boxes': torch.from_numpy(boxes),
+            'labels': torch.from_numpy(labels),
+            'scores': torch.from_numpy(scores)
         }
+    
+    @torch.inference_mode()
+    def predict(self, image: torch.Tensor, confidence_threshold: float = 0.0, best_per_class: bool = True,
+                dtype: Optional[torch.dtype] = torch.float16) -> Dict:
+        """Run inference on a single image.
         
-        if best_per_class:
-            logger.info(f"Best per class set to TRUE, getting best predictions")
-            unique_labels = np.unique(filtered_preds['labels'])
-            best_indices = []
-            
-            for label in unique_labels:
-                class_mask = filtered_preds['labels'] == label
-                if np.any(class_mask):
-                    class_scores = filtered_preds['scores'][class_mask]
-                    best_idx = np.argmax(class_scores)
-                    original_indices = np.where(class_mask)[0]
-                    best_indices.append(original_indices[best_idx])
+        On CUDA the backbone runs under autocast with ``dtype`` (pass None for full FP32).
+        """
+        if self._ort_session is not None:
+            predictions = self._run_onnx(image)
+        else:
+            self.model.eval()
+            image = _to_device(image, self.device)
             
-            filtered_preds = {
-                'boxes': filtered_preds['boxes'][best_indices],
-                'scores': filtered_preds['scores'][best_indices],
-                'labels': filtered_preds['labels'][best_indices]
-            }
+            # Get predictions
+            predictions = self._forward([image], dtype)[0]
+        
+        return _postprocess_predictions(predictions, confidence_threshold, best_per_class)
+    
+    @torch.inference_mode()
+    def predict_batch(self, images: List[torch.Tensor], confidence_threshold: float = 0.0, best_per_class: bool = True,
+                      dtype: Optional[torch.dtype] = torch.float16) -> List[Dict]:
+        """Run inference on several images (e.g. all views of a study) in one forward pass.
+        
+        Images may differ in size; Faster R-CNN's transform resizes and pads them
+        into a single batch. Returns one prediction dict per image, in order.
+        """
+        if self._ort_session is not None:
+            # The exported graph takes a single image
+            return [self.predict(image, confidence_threshold, best_per_class, dtype) for image in images]
+        
+        self.model.eval()
+        images = [_to_device(image, self.device) for image in images]
+        
+        predictions = self._forward(images, dtype)
         
-        return filtered_preds
+        return [_postprocess_predictions(pred, confidence_threshold, best_per_class) for pred in predictions]
 
 
 class FasterRCNNWithKeypointHead(nn.Module):
@@ -379,20 +565,10 @@ class FasterRCNNWithKeypointHead(nn.Module):
             # Standard FasterRCNN forward pass
             loss_dict = self.fasterrcnn(images, targets)
             
-            # Try to compute keypoint refinement loss
-            try:
-                # Get RPN proposals (features before ROI pooling)
-                # This is more complex in FasterRCNN - we'll use a simplified approach
-                # For now, just add a small regularization loss to keypoint head
-                features = self.fasterrcnn.backbone(torch.stack(images) if isinstance(images, list) else images)
-                
-                # The keypoint head would ideally get intermediate features
-                # For simplicity, we add minimal additional loss
-                keypoint_loss = torch.tensor(0.0, device=images[0].device)
-                loss_dict['keypoint_refinement_loss'] = keypoint_loss
-            except Exception as e:
-                logger.warning(f"Could not compute keypoint refinement loss: {e}")
-                loss_dict['keypoint_refinement_loss'] = torch.tensor(0.0, device=images[0].device)
+            # Keypoint refinement is not trained yet, so report a zero loss without
+            # running the backbone a second time. A real loss should take its
+            # features from fasterrcnn.roi_heads.box_roi_pool rather than recomputing them.
+            loss_dict['keypoint_refinement_loss'] = torch.tensor(0.0, device=images[0].device)
             
             return loss_dict
         
@@ -400,18 +576,22 @@ class FasterRCNNWithKeypointHead(nn.Module):
             # Inference: Use FasterRCNN predictions with keypoint refinement
             predictions = self.fasterrcnn(images)
             
-            # Add keypoint offset predictions
-            for pred in predictions:
-                # Initialize offsets (no refinement if no features available)
-                pred['keypoint_offsets'] = torch.zeros(len(pred['boxes']), 2, device=pred['boxes'].device)
-            
-            return predictions
+            return self.add_keypoint_offsets(predictions)
+    
+    @staticmethod
+    def add_keypoint_offsets(predictions: List[Dict[str, torch.Tensor]]) -> List[Dict[str, torch.Tensor]]:
+        """Add keypoint offset predictions to FasterRCNN detections, in place."""
+        for pred in predictions:
+            # Initialize offsets (no refinement if no features available)
+            pred['keypoint_offsets'] = torch.zeros(len(pred['boxes']), 2, device=pred['boxes'].device)
+        
+        return predictions
 
 
 class LegLengthDetectorWithKeypointHead:
     """Detector for leg length measurements using Faster R-CNN with specialized keypoint head."""
     
-    def __init__(self, backbone_name='resnext101_32x8d', num_classes=9, num_keypoints=8, weights='DEFAULT'):
+    def __init__(self, backbone_name='resnext101_32x8d', num_classes=9, num_keypoints=8, weights=None):
         """
         Initialize the leg length detector with keypoint head.
         
@@ -419,7 +599,8 @@ class LegLengthDetectorWithKeypointHead:
             backbone_name: Name of the backbone model to use
             num_classes: Number of classes to detect (default: 9 for 8 landmarks + background)
             num_keypoints: Number of keypoints (default: 8)
-            weights: Pre-trained weights to use ('DEFAULT', 'IMAGENET1K_V1', or None)
+            weights: Torchvision pre-trained weights to initialize from ('DEFAULT',
+                'IMAGENET1K_V1'); None (default) skips loading them
         """
         self.backbone_name = backbone_name
         self.num_classes = num_classes
@@ -446,40 +627,33 @@ class LegLengthDetectorWithKeypointHead:
         
         return model
     
-    @torch.no_grad()
-    def predict(self, image: torch.Tensor, confidence_threshold: float = 0.0, best_per_class: bool = True) -> Dict:
-        """Run inference on a single image."""
+    def _forward(self, images: List[torch.Tensor], dtype: Optional[torch.dtype] = None) -> List[Dict[str, torch.Tensor]]:
+        """Run the model on images already on the device, with only the backbone under autocast."""
+        predictions = _forward_fasterrcnn(self.model.fasterrcnn, images, dtype)
+        return FasterRCNNWithKeypointHead.add_keypoint_offsets(predictions)
+    
+    @torch.inference_mode()
+    def predict(self, image: torch.Tensor, confidence_threshold: float = 0.0, best_per_class: bool = True,
+                dtype: Optional[torch.dtype] = torch.float16) -> Dict:
+        """Run inference on a single image.
+        
+        On CUDA the backbone runs under autocast with ``dtype`` (pass None for full FP32).
+        """
         self.model.eval()
-        image = image.to(self.device)
+        image = _to_device(image, self.device)
         
         # Get predictions
-        predictions = self.model([image])[0]
-        
-        # Filter predictions by confidence
-        keep = predictions['scores'] > confidence_threshold
-        filtered_preds = {
-            'boxes': predictions['boxes'][keep].cpu().numpy(),
-            'scores': predictions['scores'][keep].cpu().numpy(),
-            'labels': predictions['labels'][keep].cpu().numpy()
-        }
+        predictions = self._forward([image], dtype)[0]
         
-        if best_per_class:
-            logger.info(f"Best per class set to TRUE, getting best predictions")
-            unique_labels = np.unique(filtered_preds['labels'])
-            best_indices = []
-            
-            for label in unique_labels:
-                class_mask = filtered_preds['labels'] == label
-                if np.any(class_mask):
-                    class_scores = filtered_preds['scores'][class_mask]
-                    best_idx = np.argmax(class_scores)
-                    original_indices = np.where(class_mask)[0]
-                    best_indices.append(original_indices[best_idx])
-            
-            filtered_preds = {
-                'boxes': filtered_preds['boxes'][best_indices],
-                'scores': filtered_preds['scores'][best_indices],
-                'labels': filtered_preds['labels'][best_indices]
-            }
+        return _postprocess_predictions(predictions, confidence_threshold, best_per_class)
+    
+    @torch.inference_mode()
+    def predict_batch(self, images: List[torch.Tensor], confidence_threshold: float = 0.0, best_per_class: bool = True,
+                      dtype: Optional[torch.dtype] = torch.float16) -> List[Dict]:
+        """Run inference on several images in one forward pass; returns one dict per image."""
+        self.model.eval()
+        images = [_to_device(image, self.device) for image in images]
+        
+        predictions = self._forward(images, dtype)
         
-        return filtered_preds
\ No newline at end of file
+        return [_postprocess_predictions(pred, confidence_threshold, best_per_class) for pred in predictions]
\ No newline at end of file
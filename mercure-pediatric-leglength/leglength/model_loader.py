@@ -3,13 +3,27 @@
 Matches the training code architecture exactly.
 """
 
+import os
 import torch
 import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional, Any
 
 logger = logging.getLogger(__name__)
 
+# Futures of loaded (or loading) detectors keyed by (model_name, device, checkpoint
+# mtime, lazy), most recently used last. The lock only guards the dict; loads run
+# outside it, and concurrent requests for the same key wait on the same Future.
+_DETECTOR_CACHE_SIZE = 8
+_detector_cache: "OrderedDict[tuple, Future]" = OrderedDict()
+_detector_cache_lock = threading.Lock()
+
+# Registry name suffixes of models with the specialized keypoint head
+KP_SUFFIXES = ('_kp_head', '_keypoint_head', '_kphead')
+
 
 class DummyDataset:
     """Dummy dataset for model initialization (matches training code interface)."""
@@ -18,9 +32,51 @@ class DummyDataset:
         self.num_classes = num_points + 1  # +1 for background
 
 
+def detection_head_type_from_name(model_name: str) -> str:
+    """Infer the detection head type from registry naming conventions."""
+    if model_name.endswith(KP_SUFFIXES):
+        return 'faster_rcnn_keypoint_head'
+    return 'faster_rcnn'
+
+
+def _materialize_meta_buffers(module: torch.nn.Module, device: torch.device) -> None:
+    """Allocate buffers still on the meta device after a lazy load.
+    
+    Only non-persistent buffers are missing from checkpoints, and in these models
+    they are zero constants (e.g. FasterRCNNWithKeypointHead._zero_offset).
+    """
+    for submodule in module.modules():
+        for name, buffer in submodule._buffers.items():
+            if buffer is not None and buffer.is_meta:
+                submodule._buffers[name] = torch.zeros_like(buffer, device=device)
+
+
+def _get_detector_class(detection_head_type: str):
+    """Map a checkpoint's detection_head_type to the inference wrapper class."""
+    from .training_models import KeypointDetector, KeypointDetectorWithSpecializedHead
+    
+    if detection_head_type == 'faster_rcnn':
+        return KeypointDetector
+    if detection_head_type == 'faster_rcnn_keypoint_head':
+        return KeypointDetectorWithSpecializedHead
+    if detection_head_type in ['faster_rcnn_heatmap', 'heatmap_offset', 'hierarchical_heatmap']:
+        # These types are not fully implemented for inference yet
+        # Fallback to standard FasterRCNN
+        logger.warning(f"{detection_head_type} not fully supported in inference module, using standard faster_rcnn")
+        return KeypointDetector
+    raise ValueError(
+        f"Unknown detection_head_type: {detection_head_type}. "
+        f"Supported: 'faster_rcnn', 'faster_rcnn_keypoint_head', 'faster_rcnn_heatmap', "
+        f"'heatmap_offset', 'hierarchical_heatmap'"
+    )
+
+
 def load_model_from_checkpoint(
     model_name: str,
-    device: Optional[torch.device] = None
+    device: Optional[torch.device] = None,
+    checkpoint: Optional[dict] = None,
+    lazy: bool = False,
+    compile: bool = True
 ) -> Any:
     """Load model from checkpoint with automatic architecture detection.
     
@@ -31,9 +87,27 @@ def load_model_from_checkpoint(
     - 'heatmap_offset': HeatmapOffset detector (fallback to faster_rcnn)
     - 'hierarchical_heatmap': Hierarchical heatmap detector (fallback to faster_rcnn)
     
+    Loaded detectors are cached per (model name, device, lazy), so repeated calls
+    for successive cases reuse the model already on the device. The cache entry is
+    invalidated when the checkpoint file changes. Different models load in
+    parallel; concurrent calls for the same model share one load. Calls with a
+    caller-supplied ``checkpoint`` are not cached, since its contents need not
+    match the file.
+    
+    The checkpoint is read on a worker thread while the architecture guessed from
+    the model name is built, so disk I/O overlaps with model construction. If the
+    checkpoint metadata disagrees with the guess, the model is rebuilt.
+    
     Args:
         model_name: Name of model in registry (e.g., 'resnet50_kp_head', 'vit_l_16')
         device: Device to load model on
+        checkpoint: Already deserialized checkpoint for this model (on any device),
+            used instead of reading the file again
+        lazy: Build the model on the meta device (no parameter allocation or init)
+            and memory-map the checkpoint, so weights are materialized exactly once,
+            straight from the file
+        compile: If False, build a fresh, uncompiled PyTorch model (for ONNX export
+            or tracing), bypassing both the detector cache and any TensorRT engine
         
     Returns:
         Model instance with loaded weights
@@ -49,61 +123,121 @@ def load_model_from_checkpoint(
     if not Path(model_path).exists():
         raise FileNotFoundError(f"Model checkpoint not found: {model_path}")
     
-    # Load checkpoint
-    checkpoint = torch.load(model_path, map_location=device, weights_only=False)
+    if not compile or checkpoint is not None:
+        return _load_detector(model_name, model_path, device, checkpoint, lazy, compile=compile)
+    
+    cache_key = (model_name, torch.device(device), os.path.getmtime(model_path), lazy)
+    with _detector_cache_lock:
+        future = _detector_cache.get(cache_key)
+        owner = future is None
+        if owner:
+            future = Future()
+            _detector_cache[cache_key] = future
+            if len(_detector_cache) > _DETECTOR_CACHE_SIZE:
+                _detector_cache.popitem(last=False)
+        else:
+            _detector_cache.move_to_end(cache_key)
+    
+    if not owner:
+        logger.info(f"Reusing cached model '{model_name}' on {device}")
+        return future.result()
+    
+    try:
+        model = _load_detector(model_name, model_path, device, checkpoint, lazy)
+    except BaseException as e:
+        # Drop the failed entry so the next call retries; current waiters get the error
+        with _detector_cache_lock:
+            if _detector_cache.get(cache_key) is future:
+                del _detector_cache[cache_key]
+        future.set_exception(e)
+        raise
+    
+    future.set_result(model)
+    return model
+
+
+def _load_detector(model_name: str, model_path: str, device: torch.device,
+                   checkpoint: Optional[dict] = None, lazy: bool = False, compile: bool = True) -> Any:
+    """Build the detector for a checkpoint and load its weights."""
+    from .detector import LegLengthDetector
+    from .tensorrt_detector import TensorRTKeypointDetector, get_onnx_path, tensorrt_enabled, tensorrt_precision
+    
+    # Use the exported TensorRT engine (export_tensorrt.py) only when explicitly
+    # enabled with LEGLENGTH_TENSORRT=1 on a GPU; otherwise run the PyTorch model
+    if compile and torch.device(device).type == 'cuda' and tensorrt_enabled():
+        onnx_path = get_onnx_path(model_name)
+        if not os.path.exists(onnx_path):
+            logger.warning(f"LEGLENGTH_TENSORRT is set but '{model_name}' has not been exported, using PyTorch")
+        else:
+            try:
+                return TensorRTKeypointDetector(onnx_path, precision=tensorrt_precision())
+            except Exception as e:
+                logger.warning(f"TensorRT backend unavailable for '{model_name}', using PyTorch: {e}")
+    
+    # Create dummy dataset (8 landmarks for leg length)
+    dataset = DummyDataset(num_points=8)
+    
+    # Models are built directly on the target device and the checkpoint tensors
+    # (already loaded there via map_location) are assigned in place, so weights
+    # are never materialized twice or copied host-to-device after loading.
+    guessed_class = _get_detector_class(detection_head_type_from_name(model_name))
+    guessed_backbone = LegLengthDetector._extract_backbone_name(model_name)
+    
+    # A caller-supplied checkpoint may live on another device, so its tensors are
+    # copied into the parameters instead of assigned. Lazy loading builds the model
+    # on the meta device and assigns the memory-mapped CPU tensors, then moves the
+    # whole model to the device in one pass.
+    assign = checkpoint is None or lazy
+    build_device = 'meta' if lazy else device
+    
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        # Load checkpoint in the background
+        if checkpoint is None and lazy:
+            checkpoint_future = executor.submit(torch.load, model_path, map_location='cpu', mmap=True, weights_only=False)
+        elif checkpoint is None:
+            checkpoint_future = executor.submit(torch.load, model_path, map_location=device, weights_only=False)
+        
+        # Registry names are not always backbone names (e.g. 'rn50adkp'), in which
+        # case the guess cannot be built and we wait for the checkpoint metadata
+        try:
+            with torch.device(build_device):
+                model = guessed_class(dataset, backbone=guessed_backbone, compile=compile)
+        except ValueError:
+            model = None
+        
+        if checkpoint is None:
+            checkpoint = checkpoint_future.result()
     
     # Extract metadata
     metadata = checkpoint.get('metadata', {})
     detection_head_type = metadata.get('detection_head_type', None)
     
     # Extract backbone name
-    if 'backbone' in metadata:
-        backbone_name = metadata['backbone']
-    else:
-        backbone_name = LegLengthDetector._extract_backbone_name(model_name)
+    backbone_name = metadata.get('backbone', guessed_backbone)
     
     # Auto-detect model type if not specified in metadata
     if detection_head_type is None:
-        if any(suffix in model_name for suffix in ['_kp_head', '_keypoint_head', '_kphead']):
-            detection_head_type = 'faster_rcnn_keypoint_head'
-            logger.info(f"Auto-detected keypoint head model from name: {model_name}")
-        else:
-            detection_head_type = 'faster_rcnn'
-            logger.info(f"Auto-detected standard Faster R-CNN from name: {model_name}")
+        detection_head_type = detection_head_type_from_name(model_name)
+        logger.info(f"Auto-detected detection head type '{detection_head_type}' from name: {model_name}")
     
     logger.info(f"Loading model '{model_name}' - Type: {detection_head_type}, Backbone: {backbone_name}")
     
-    # Create dummy dataset (8 landmarks for leg length)
-    dataset = DummyDataset(num_points=8)
-    
-    # Load model using training code's approach
-    if detection_head_type == 'faster_rcnn':
-        from .training_models import KeypointDetector
-        model = KeypointDetector(dataset, backbone=backbone_name)
-        model.model.load_state_dict(checkpoint['model_state_dict'])
-        model.model.to(device)
+    detector_class = _get_detector_class(detection_head_type)
+    if model is None or detector_class is not guessed_class or backbone_name != guessed_backbone:
+        logger.info(f"Checkpoint metadata differs from name-based guess, building {detector_class.__name__}")
+        with torch.device(build_device):
+            model = detector_class(dataset, backbone=backbone_name, compile=compile)
     
-    elif detection_head_type == 'faster_rcnn_keypoint_head':
-        from .training_models import KeypointDetectorWithSpecializedHead
-        model = KeypointDetectorWithSpecializedHead(dataset, backbone=backbone_name)
-        model.model.load_state_dict(checkpoint['model_state_dict'])
-        model.model.to(device)
-    
-    elif detection_head_type in ['faster_rcnn_heatmap', 'heatmap_offset', 'hierarchical_heatmap']:
-        # These types are not fully implemented for inference yet
-        # Fallback to standard FasterRCNN
-        logger.warning(f"{detection_head_type} not fully supported in inference module, using standard faster_rcnn")
-        from .training_models import KeypointDetector
-        model = KeypointDetector(dataset, backbone=backbone_name)
-        model.model.load_state_dict(checkpoint['model_state_dict'])
+    model.model.load_state_dict(checkpoint['model_state_dict'], assign=assign)
+    if lazy:
+        _materialize_meta_buffers(model.model, device)
         model.model.to(device)
     
-    else:
-        raise ValueError(
-            f"Unknown detection_head_type: {detection_head_type}. "
-            f"Supported: 'faster_rcnn', 'faster_rcnn_keypoint_head', 'faster_rcnn_heatmap', "
-            f"'heatmap_offset', 'hierarchical_heatmap'"
-        )
+    # Inference only: parameters never need autograd tracking, and preprocessed
+    # inputs have a fixed size, so cuDNN can autotune its conv algorithms once
+    model.model.requires_grad_(False)
+    torch.backends.cudnn.benchmark = True
+    model.warmup()
     
     logger.info(f"Successfully loaded model from {model_path}")
     return model
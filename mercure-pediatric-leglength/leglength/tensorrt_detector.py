@@ -0,0 +1,114 @@
+"""TensorRT inference backend for exported leg length detectors.
+
+Runs an ONNX export of a trained detector (see export_tensorrt.py) through
+ONNX Runtime's TensorRT execution provider. The provider builds the engine on
+first use and caches it on disk next to the ONNX file, so later processes
+deserialize the prebuilt engine instead of rebuilding it.
+
+The backend is opt-in: the model loader only uses it when LEGLENGTH_TENSORRT=1.
+Engines are built in FP32 by default. FP16 (LEGLENGTH_TENSORRT_PRECISION=fp16)
+applies to the whole exported graph, including the RPN/ROI box decoding that the
+PyTorch path keeps in FP32, so enable it only after validating the measurements.
+"""
+
+import os
+import logging
+from typing import Dict, Optional
+
+import numpy as np
+import torch
+
+logger = logging.getLogger(__name__)
+
+# Supported engine precisions
+TENSORRT_PRECISIONS = ('fp32', 'fp16')
+
+
+def tensorrt_enabled() -> bool:
+    """Whether the model loader should use exported TensorRT engines (LEGLENGTH_TENSORRT=1)."""
+    return os.environ.get('LEGLENGTH_TENSORRT', '').lower() in ('1', 'true', 'yes')
+
+
+def tensorrt_precision() -> str:
+    """Engine precision the model loader builds (LEGLENGTH_TENSORRT_PRECISION, default fp32)."""
+    return os.environ.get('LEGLENGTH_TENSORRT_PRECISION', 'fp32').lower()
+
+
+def get_onnx_path(model_name: str) -> str:
+    """Path of the exported ONNX model for a registry model name."""
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(project_root, 'models', f"{model_name}.onnx")
+
+
+class TensorRTKeypointDetector:
+    """Drop-in replacement for KeypointDetector.predict backed by a TensorRT engine."""
+    
+    def __init__(self, onnx_path: str, precision: str = 'fp32', engine_cache_dir: Optional[str] = None):
+        """Create the TensorRT session.
+        
+        Args:
+            onnx_path: Path to the exported ONNX model
+            precision: 'fp32' (default) or 'fp16'; fp16 also runs the box decoding in half precision
+            engine_cache_dir: Where built engines are cached (default: next to the ONNX file)
+        
+        Raises:
+            ImportError: If onnxruntime is not installed
+            RuntimeError: If the TensorRT execution provider is not available
+        """
+        import onnxruntime as ort
+        
+        if precision not in TENSORRT_PRECISIONS:
+            raise ValueError(f"Unsupported precision '{precision}'. Supported: {', '.join(TENSORRT_PRECISIONS)}")
+        if 'TensorrtExecutionProvider' not in ort.get_available_providers():
+            raise RuntimeError("TensorrtExecutionProvider is not available in this onnxruntime build")
+        
+        self.onnx_path = onnx_path
+        self.precision = precision
+        self.device = torch.device('cuda')
+        
+        engine_cache_dir = engine_cache_dir or os.path.dirname(os.path.abspath(onnx_path))
+        trt_options = {
+            'trt_fp16_enable': precision == 'fp16',
+            'trt_engine_cache_enable': True,
+            'trt_engine_cache_path': engine_cache_dir,
+        }
+        
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            onnx_path,
+            sess_options=options,
+            providers=[('TensorrtExecutionProvider', trt_options), 'CUDAExecutionProvider']
+        )
+        self.input_name = self.session.get_inputs()[0].name
+        logger.info(f"TensorRT session ready for {onnx_path} ({precision})")
+    
+    def predict(self, image: torch.Tensor, confidence_threshold: float = 0.0, best_per_class: bool = True) -> Dict:
+        """Run inference on a single image.
+        
+        Args:
+            image: Preprocessed image tensor [3, H, W] matching the exported shape
+            confidence_threshold: Minimum confidence score for predictions
+            best_per_class: If True, return only the best prediction per class
+        
+        Returns:
+            Dictionary with 'boxes', 'scores', 'labels' arrays
+        """
+        boxes, labels, scores = self.session.run(None, {self.input_name: image.cpu().numpy()})
+        
+        # Filter predictions by confidence
+        keep = scores > confidence_threshold
+        boxes, scores, labels = boxes[keep], scores[keep], labels[keep]
+        
+        if best_per_class and len(labels):
+            # Sort by label, then by descending score; the first entry of each label group wins
+            order = np.lexsort((-scores, labels))
+            sorted_labels = labels[order]
+            best_indices = order[np.concatenate(([True], sorted_labels[1:] != sorted_labels[:-1]))]
+            boxes, scores, labels = boxes[best_indices], scores[best_indices], labels[best_indices]
+        
+        return {
+            'boxes': boxes.reshape(-1, 4),
+            'scores': scores,
+            'labels': labels
+        }
@@ -12,194 +12,473 @@ from torchvision.models.detection import FasterRCNN
 from torchvision.models.detection.faster_rcnn import FastRCNNPredictor
 from torchvision.models.detection.rpn import AnchorGenerator
 from torchvision.ops import MultiScaleRoIAlign
-from typing import Optional, Dict
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Tuple
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
+# Backbone CUDA graphs kept per detector; each holds its own memory pool, so
+# further input shapes run eagerly instead of capturing more graphs
+MAX_CUDA_GRAPHS = 2
+
+
+def _move_to_device(model: nn.Module, device: torch.device) -> None:
+    """Move ``model`` to ``device``, unless it was built on the meta device.
+    
+    Meta models have no storage to move; their weights are assigned later by
+    load_state_dict(assign=True) (see model_loader lazy loading).
+    """
+    if not next(model.parameters()).is_meta:
+        model.to(device)
+
+
+def _readonly(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+# Shared result for images without detections (arrays are read-only)
+_EMPTY_RESULT = {
+    'boxes': _readonly(np.zeros((0, 4), dtype=np.float32)),
+    'scores': _readonly(np.zeros((0,), dtype=np.float32)),
+    'labels': _readonly(np.zeros((0,), dtype=np.int64))
+}
+
+
+def _best_per_class_indices(labels: torch.Tensor, scores: torch.Tensor) -> torch.Tensor:
+    """Return the index of the highest-scoring prediction for each label, ordered by label.
+    
+    Runs on whatever device the tensors live on, so no host sync is needed.
+    """
+    # Sort by descending score, then stably by label; the first entry of each label group wins
+    order = torch.argsort(scores, descending=True, stable=True)
+    order = order[torch.argsort(labels[order], stable=True)]
+    sorted_labels = labels[order]
+    first_of_group = torch.ones_like(sorted_labels, dtype=torch.bool)
+    first_of_group[1:] = sorted_labels[1:] != sorted_labels[:-1]
+    return order[first_of_group]
+
+
+@dataclass
+class CudaGraphState:
+    """A captured backbone CUDA graph and the static tensors it reads and writes."""
+    graph: Any
+    static_input: torch.Tensor
+    static_output: Any
+
+
+def _capture_backbone_graph(backbone: nn.Module, example: torch.Tensor) -> CudaGraphState:
+    """Capture ``backbone(example)`` into a CUDA graph."""
+    static_input = example.clone()
+    
+    # Warm up on a side stream so lazy initialization (cuDNN autotuning, allocator
+    # growth) happens outside the captured region
+    stream = torch.cuda.Stream()
+    stream.wait_stream(torch.cuda.current_stream())
+    with torch.cuda.stream(stream):
+        for _ in range(3):
+            backbone(static_input)
+    torch.cuda.current_stream().wait_stream(stream)
+    
+    graph = torch.cuda.CUDAGraph()
+    with torch.cuda.graph(graph):
+        static_output = backbone(static_input)
+    
+    return CudaGraphState(graph=graph, static_input=static_input, static_output=static_output)
+
+
+@dataclass
+class CudaGraphCache:
+    """A detector's captured backbone graphs per (input shape, dtype).
+    
+    The lock serializes capture and replay, since every replay of a graph writes
+    the same static buffers. ``disabled`` is set after a failed capture, so the
+    backbone then runs eagerly instead of retrying the capture on every call.
+    """
+    states: Dict[Tuple, CudaGraphState] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    disabled: bool = False
+
+
+def _run_backbone_graph(backbone: nn.Module, batch: torch.Tensor, dtype: Optional[torch.dtype],
+                        cache: CudaGraphCache):
+    """Run the backbone by replaying its CUDA graph, capturing it on first use.
+    
+    The features are copied out of the graph's static output (as FP32) before the
+    lock is released, so concurrent predict() calls on a shared detector cannot
+    overwrite each other's results. Once MAX_CUDA_GRAPHS shapes are captured,
+    other shapes run eagerly, as does everything after a failed capture.
+    """
+    key = (tuple(batch.shape), dtype)
+    with cache.lock:
+        state = cache.states.get(key)
+        if state is None and not cache.disabled and len(cache.states) < MAX_CUDA_GRAPHS:
+            try:
+                state = _capture_backbone_graph(backbone, batch)
+            except Exception as e:
+                cache.disabled = True
+                logger.warning(f"CUDA graph capture failed for input shape {key[0]}, "
+                               f"running the backbone eagerly: {e}")
+            else:
+                cache.states[key] = state
+                logger.info(f"Captured backbone CUDA graph for input shape {key[0]}")
+        
+        if state is not None:
+            state.static_input.copy_(batch, non_blocking=True)
+            state.graph.replay()
+            output = state.static_output
+            if isinstance(output, torch.Tensor):
+                return output.to(torch.float32, copy=True)
+            return OrderedDict((name, feature.to(torch.float32, copy=True)) for name, feature in output.items())
+    
+    return backbone(batch)
+
+
+def _autocast(device: torch.device, dtype: Optional[torch.dtype]):
+    """Autocast context for the backbone forward; only enabled on CUDA with a dtype.
+    
+    The autocast weight cache is disabled because cached casts would be freed
+    between CUDA graph capture and replay.
+    """
+    return torch.autocast(device_type=device.type, dtype=dtype, enabled=dtype is not None and device.type == 'cuda',
+                          cache_enabled=False)
+
+
+def _forward_fasterrcnn(model: FasterRCNN, images: List[torch.Tensor], dtype: Optional[torch.dtype] = None,
+                        graph_cache: Optional[CudaGraphCache] = None) -> List[Dict[str, torch.Tensor]]:
+    """Run FasterRCNN on a batch of images, optionally with an autocast/graph-replayed backbone.
+    
+    Mirrors GeneralizedRCNN.forward in eval mode. Only the backbone (+FPN) runs
+    under autocast; its features are cast back to FP32 so the RPN and ROI heads
+    decode boxes at full precision. When ``graph_cache`` is given the backbone
+    is replayed from a CUDA graph: it has static shapes, while the RPN and ROI
+    heads produce data-dependent proposal counts and stay eager. A graph is
+    captured the first time each batched input shape is seen (up to
+    MAX_CUDA_GRAPHS); preprocessed images are a fixed size, so in practice that
+    is once.
+    """
+    original_image_sizes = [tuple(image.shape[-2:]) for image in images]
+    device = images[0].device
+    images, _ = model.transform(images)
+    
+    with _autocast(device, dtype):
+        if graph_cache is None:
+            features = model.backbone(images.tensors)
+        else:
+            features = _run_backbone_graph(model.backbone, images.tensors, dtype, graph_cache)
+    
+    if isinstance(features, torch.Tensor):
+        features = OrderedDict([('0', features)])
+    features = OrderedDict((name, feature.float()) for name, feature in features.items())
+    proposals, _ = model.rpn(images, features)
+    detections, _ = model.roi_heads(features, proposals, images.image_sizes)
+    return model.transform.postprocess(detections, images.image_sizes, original_image_sizes)
+
+
+def _filter_predictions(predictions: Dict[str, torch.Tensor], confidence_threshold: float,
+                        best_per_class: bool) -> Dict[str, np.ndarray]:
+    """Filter one image's raw detections on the device and copy them to the host."""
+    # Filter predictions by confidence
+    keep = predictions['scores'] > confidence_threshold
+    boxes = predictions['boxes'][keep]
+    scores = predictions['scores'][keep]
+    labels = predictions['labels'][keep]
+    
+    if len(scores) == 0:
+        # Nothing to copy back; callers may replace entries, so hand out a fresh dict
+        return dict(_EMPTY_RESULT)
+    
+    if best_per_class:
+        # Vectorized on the device, before anything is copied to the host
+        best_indices = _best_per_class_indices(labels, scores)
+        boxes, scores, labels = boxes[best_indices], scores[best_indices], labels[best_indices]
+    
+    # One device-to-host copy (and sync) for all three outputs instead of three
+    packed = torch.cat([boxes.float(), scores.float().unsqueeze(1), labels.float().unsqueeze(1)], dim=1)
+    packed = packed.cpu().numpy()
+    return {
+        'boxes': packed[:, :4],
+        'scores': packed[:, 4],
+        'labels': packed[:, 5].astype(np.int64)
+    }
+
+
+def _compile_backbone(model: FasterRCNN, backbone_name: str) -> bool:
+    """Compile ``model.backbone`` in place with torch.compile.
+    
+    Only the backbone (+FPN) is compiled: it has static shapes, while the RPN and
+    ROI heads produce data-dependent proposal counts that would keep recompiling.
+    Module.compile() keeps the state_dict keys unchanged, so checkpoints still load.
+    Compilation itself is lazy: Dynamo/Inductor errors surface on the first
+    forward, which the detectors' warmup() catches (see _uncompile_backbone).
+    
+    Returns:
+        True if the backbone was compiled
+    """
+    try:
+        model.backbone.compile(mode='reduce-overhead', fullgraph=False)
+        return True
+    except Exception as e:
+        logger.warning(f"torch.compile unavailable for {backbone_name}, using eager backbone: {e}")
+        return False
+
+
+def _uncompile_backbone(model: FasterRCNN) -> None:
+    """Undo _compile_backbone so the backbone runs eagerly again."""
+    model.backbone._compiled_call_impl = None
+
+
+class ViTBackbone(nn.Module):
+    """torchvision ViT encoder exposed as a single-feature-map Faster R-CNN backbone."""
+    
+    original_grid_size: int
+    patch_size: int
+    
+    def __init__(self, vit_model, out_channels: int, patch_size: int):
+        super().__init__()
+        self.conv_proj = vit_model.conv_proj
+        self.encoder = vit_model.encoder
+        self.out_channels = out_channels
+        self.patch_size = patch_size
+        
+        # Store original position embeddings
+        self.original_pos_embed = vit_model.encoder.pos_embedding
+        self.original_grid_size = int((self.original_pos_embed.shape[1] - 1) ** 0.5)
+        
+        # Interpolated position embeddings per patch grid, reused at inference
+        self._pos_embed_cache: Dict[Tuple, torch.Tensor] = {}
+    
+    def cached_pos_encoding(self, H: int, W: int) -> torch.Tensor:
+        # Keyed on the parameter's storage and version as well as the grid,
+        # so loading new weights (in place or by assignment) invalidates it
+        pos_embed = self.original_pos_embed
+        if torch.is_grad_enabled():
+            return self.interpolate_pos_encoding(pos_embed, H, W)
+        
+        key = (H, W, pos_embed.data_ptr(), pos_embed._version)
+        cached = self._pos_embed_cache.get(key)
+        if cached is None:
+            self._pos_embed_cache.clear()
+            cached = self.interpolate_pos_encoding(pos_embed, H, W)
+            self._pos_embed_cache[key] = cached
+        return cached
+    
+    def interpolate_pos_encoding(self, pos_embed: torch.Tensor, H: int, W: int) -> torch.Tensor:
+        npatch = H * W
+        N = pos_embed.shape[1] - 1
+        
+        if npatch == N:
+            return pos_embed
+        
+        class_pos_embed = pos_embed[:, :1]
+        patch_pos_embed = pos_embed[:, 1:]
+        
+        patch_pos_embed = patch_pos_embed.reshape(1, self.original_grid_size, self.original_grid_size, -1)
+        patch_pos_embed = patch_pos_embed.permute(0, 3, 1, 2)
+        
+        patch_pos_embed = torch.nn.functional.interpolate(
+            patch_pos_embed, size=(H, W), mode='bicubic', align_corners=False
+        )
+        
+        patch_pos_embed = patch_pos_embed.permute(0, 2, 3, 1).reshape(1, H * W, -1)
+        
+        return torch.cat([class_pos_embed, patch_pos_embed], dim=1)
+    
+    def forward(self, x: torch.Tensor) -> Dict[str, torch.Tensor]:
+        x = self.conv_proj(x)
+        B, C, H, W = x.shape
+        
+        x = x.flatten(2).transpose(1, 2)
+        
+        pos_embed = self.cached_pos_encoding(H, W)
+        
+        # Prepend the class token (the first position embedding) and add the
+        # position embeddings, writing both into a single output tensor
+        tokens = x.new_empty(B, H * W + 1, C)
+        tokens[:, :1] = self.original_pos_embed[:, :1] + pos_embed[:, :1]
+        tokens[:, 1:] = x + pos_embed[:, 1:]
+        
+        x = self.encoder.dropout(tokens)
+        x = self.encoder.layers(x)
+        
+        x = x[:, 1:]
+        x = x.transpose(1, 2).view(B, C, H, W)
+        
+        return {'0': x}
+
+
+def build_fasterrcnn(num_classes: int, backbone: str, weights=None) -> FasterRCNN:
+    """Create a Faster R-CNN model with the specified backbone (shared by both detector classes)."""
+    
+    def _modify_classifier(model, num_classes):
+        """Modify the model's box predictor to match our number of classes."""
+        in_features = model.roi_heads.box_predictor.cls_score.in_features
+        model.roi_heads.box_predictor = FastRCNNPredictor(in_features, num_classes)
+        return model
+    
+    # Pre-built models from torchvision
+    if backbone == "resnet50":
+        # Use weights=None since we load our own trained checkpoint
+        # This avoids downloading COCO weights at runtime
+        model = torchvision.models.detection.fasterrcnn_resnet50_fpn(
+            weights=None,
+            weights_backbone=None,
+            trainable_backbone_layers=5
+        )
+        model = _modify_classifier(model, num_classes)
+        
+    elif backbone in ["convnext_tiny", "convnext_small", "convnext_base", "convnext_large"]:
+        # ConvNeXt backbones - use weights=None since we load our own checkpoint
+        backbone_fn = getattr(torchvision.models, backbone)
+        backbone_model = backbone_fn(weights=None)
+        
+        # Determine out_channels based on model variant
+        if backbone == "convnext_tiny":
+            out_channels = 768
+        elif backbone == "convnext_small":
+            out_channels = 768
+        elif backbone == "convnext_base":
+            out_channels = 1024
+        elif backbone == "convnext_large":
+            out_channels = 1536
+        else:
+            out_channels = 768  # default
+        
+        class ConvNeXtBackbone(nn.Module):
+            def __init__(self, convnext_model, out_channels):
+                super().__init__()
+                self.features = convnext_model.features
+                self.avgpool = convnext_model.avgpool
+                self.out_channels = out_channels
+            
+            def forward(self, x):
+                # Depthwise 7x7 convs and LayerNorm run faster in NHWC on GPU
+                x = self.features(x.contiguous(memory_format=torch.channels_last))
+                return {'0': x}
+        
+        bb = ConvNeXtBackbone(backbone_model, out_channels)
+        bb = bb.to(memory_format=torch.channels_last)
+        # load_state_dict(assign=True) takes the checkpoint tensors' (NCHW) layout,
+        # so convert the weights again after loading
+        bb.register_load_state_dict_post_hook(
+            lambda module, incompatible_keys: module.to(memory_format=torch.channels_last)
+        )
+        
+        anchor_generator = AnchorGenerator(
+            sizes=((32, 64, 128, 256, 512),),
+            aspect_ratios=((0.5, 1.0, 2.0),)
+        )
+        
+        roi_pooler = MultiScaleRoIAlign(
+            featmap_names=['0'],
+            output_size=7,
+            sampling_ratio=2
+        )
+        
+        model = FasterRCNN(
+            backbone=bb,
+            num_classes=num_classes,
+            rpn_anchor_generator=anchor_generator,
+            box_roi_pool=roi_pooler
+        )
+    
+    elif backbone in ["vit_b_16", "vit_b_32", "vit_l_16", "vit_l_32"]:
+        # Vision Transformer backbones - use weights=None since we load our own checkpoint
+        backbone_fn = getattr(torchvision.models, backbone)
+        backbone_model = backbone_fn(weights=None)
+        
+        patch_size = int(backbone.split('_')[-1])
+        out_channels = 768 if 'b_' in backbone else 1024
+        
+        bb = ViTBackbone(backbone_model, out_channels, patch_size)
+        
+        anchor_generator = AnchorGenerator(
+            sizes=((32, 64, 128, 256, 512),),
+            aspect_ratios=((0.5, 1.0, 2.0),)
+        )
+        
+        roi_pooler = MultiScaleRoIAlign(
+            featmap_names=['0'],
+            output_size=7,
+            sampling_ratio=2
+        )
+        
+        model = FasterRCNN(
+            backbone=bb,
+            num_classes=num_classes,
+            rpn_anchor_generator=anchor_generator,
+            box_roi_pool=roi_pooler
+        )
+    
+    else:
+        raise ValueError(f"Unsupported backbone: {backbone}")
+    
+    return model
+
 
 class KeypointDetector:
     """Standard Faster R-CNN keypoint detector (from training code)."""
     
-    def __init__(self, dataset, backbone: str = 'resnet50', weights=None):
+    def __init__(self, dataset, backbone: str = 'resnet50', weights=None, compile: bool = True):
         """Initialize the model.
         
         Args:
             dataset: Dataset object with num_classes and num_points attributes
             backbone: Backbone architecture name
             weights: Optional weights to load
+            compile: Compile the backbone with torch.compile (CUDA only)
         """
         self.num_classes = dataset.num_classes
         self.num_keypoints = dataset.num_points
         self.backbone = backbone
-        self.model = self._create_model(self.num_classes, backbone, weights)
+        self.model = build_fasterrcnn(self.num_classes, backbone, weights)
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-        self.model.to(self.device)
-    
-    def _create_model(self, num_classes: int, backbone: str, weights) -> FasterRCNN:
-        """Create Faster R-CNN model with specified backbone."""
-        
-        def _modify_classifier(model, num_classes):
-            """Modify the model's box predictor to match our number of classes."""
-            in_features = model.roi_heads.box_predictor.cls_score.in_features
-            model.roi_heads.box_predictor = FastRCNNPredictor(in_features, num_classes)
-            return model
-        
-        # Pre-built models from torchvision
-        if backbone == "resnet50":
-            # Use weights=None since we load our own trained checkpoint
-            # This avoids downloading COCO weights at runtime
-            model = torchvision.models.detection.fasterrcnn_resnet50_fpn(
-                weights=None,
-                weights_backbone=None,
-                trainable_backbone_layers=5
-            )
-            model = _modify_classifier(model, num_classes)
-            
-        elif backbone in ["convnext_tiny", "convnext_small", "convnext_base", "convnext_large"]:
-            # ConvNeXt backbones - use weights=None since we load our own checkpoint
-            backbone_fn = getattr(torchvision.models, backbone)
-            backbone_model = backbone_fn(weights=None)
-            
-            # Determine out_channels based on model variant
-            if backbone == "convnext_tiny":
-                out_channels = 768
-            elif backbone == "convnext_small":
-                out_channels = 768
-            elif backbone == "convnext_base":
-                out_channels = 1024
-            elif backbone == "convnext_large":
-                out_channels = 1536
-            else:
-                out_channels = 768  # default
-            
-            class ConvNeXtBackbone(nn.Module):
-                def __init__(self, convnext_model, out_channels):
-                    super().__init__()
-                    self.features = convnext_model.features
-                    self.avgpool = convnext_model.avgpool
-                    self.out_channels = out_channels
-                
-                def forward(self, x):
-                    x = self.features(x)
-                    return {'0': x}
-            
-            bb = ConvNeXtBackbone(backbone_model, out_channels)
-            
-            anchor_generator = AnchorGenerator(
-                sizes=((32, 64, 128, 256, 512),),
-                aspect_ratios=((0.5, 1.0, 2.0),)
-            )
-            
-            roi_pooler = MultiScaleRoIAlign(
-                featmap_names=['0'],
-                output_size=7,
-                sampling_ratio=2
-            )
-            
-            model = FasterRCNN(
-                backbone=bb,
-                num_classes=num_classes,
-                rpn_anchor_generator=anchor_generator,
-                box_roi_pool=roi_pooler
-            )
-        
-        elif backbone in ["vit_b_16", "vit_b_32", "vit_l_16", "vit_l_32"]:
-            # Vision Transformer backbones - use weights=None since we load our own checkpoint
-            backbone_fn = getattr(torchvision.models, backbone)
-            backbone_model = backbone_fn(weights=None)
-            
-            patch_size = int(backbone.split('_')[-1])
-            out_channels = 768 if 'b_' in backbone else 1024
-            
-            class ViTBackbone(nn.Module):
-                def __init__(self, vit_model, out_channels, patch_size):
-                    super().__init__()
-                    self.conv_proj = vit_model.conv_proj
-                    self.encoder = vit_model.encoder
-                    self.out_channels = out_channels
-                    self.patch_size = patch_size
-                    
-                    # Store original position embeddings
-                    self.original_pos_embed = vit_model.encoder.pos_embedding
-                    self.original_grid_size = int((self.original_pos_embed.shape[1] - 1) ** 0.5)
-                
-                def interpolate_pos_encoding(self, pos_embed, H, W):
-                    npatch = H * W
-                    N = pos_embed.shape[1] - 1
-                    
-                    if npatch == N:
-                        return pos_embed
-                    
-                    class_pos_embed = pos_embed[:, :1]
-                    patch_pos_embed = pos_embed[:, 1:]
-                    
-                    patch_pos_embed = patch_pos_embed.reshape(1, self.original_grid_size, self.original_grid_size, -1)
-                    patch_pos_embed = patch_pos_embed.permute(0, 3, 1, 2)
-                    
-                    patch_pos_embed = torch.nn.functional.interpolate(
-                        patch_pos_embed, size=(H, W), mode='bicubic', align_corners=False
-                    )
-                    
-                    patch_pos_embed = patch_pos_embed.permute(0, 2, 3, 1).reshape(1, H * W, -1)
-                    
-                    return torch.cat([class_pos_embed, patch_pos_embed], dim=1)
-                
-                def forward(self, x):
-                    x = self.conv_proj(x)
-                    B, C, H, W = x.shape
-                    
-                    x = x.flatten(2).transpose(1, 2)
-                    
-                    class_token = self.original_pos_embed[:, :1].expand(B, -1, -1)
-                    x = torch.cat([class_token, x], dim=1)
-                    
-                    pos_embed = self.interpolate_pos_encoding(self.original_pos_embed, H, W)
-                    
-                    x = x + pos_embed
-                    x = self.encoder.dropout(x)
-                    
-                    for layer in self.encoder.layers:
-                        x = layer(x)
-                    
-                    x = x[:, 1:]
-                    x = x.transpose(1, 2).view(B, C, H, W)
-                    
-                    return {'0': x}
-            
-            bb = ViTBackbone(backbone_model, out_channels, patch_size)
-            
-            anchor_generator = AnchorGenerator(
-                sizes=((32, 64, 128, 256, 512),),
-                aspect_ratios=((0.5, 1.0, 2.0),)
-            )
-            
-            roi_pooler = MultiScaleRoIAlign(
-                featmap_names=['0'],
-                output_size=7,
-                sampling_ratio=2
-            )
-            
-            model = FasterRCNN(
-                backbone=bb,
-                num_classes=num_classes,
-                rpn_anchor_generator=anchor_generator,
-                box_roi_pool=roi_pooler
-            )
+        _move_to_device(self.model, self.device)
+        self.model.eval()
         
-        else:
-            raise ValueError(f"Unsupported backbone: {backbone}")
+        # Backbone CUDA graphs per input shape, captured lazily in predict() once
+        # the checkpoint weights are in place. A compiled backbone in
+        # 'reduce-overhead' mode already replays CUDA graphs, so the manual path is
+        # only used when compilation is off or fails.
+        self.compiled = compile and self.device.type == 'cuda' and _compile_backbone(self.model, backbone)
+        self.use_cuda_graphs = self.device.type == 'cuda' and not self.compiled
+        self._cuda_graphs = CudaGraphCache()
+    
+    def warmup(self) -> None:
+        """Trigger backbone compilation with a dummy forward.
         
-        return model
+        Call once the checkpoint weights are loaded, so the CUDA graphs recorded
+        by torch.compile read the final parameters.
+        """
+        if self.compiled:
+            try:
+                self.predict(torch.zeros(3, 512, 512, device=self.device))
+                logger.info(f"Compiled {self.backbone} backbone with torch.compile")
+            except Exception as e:
+                # Fall back to the eager backbone with manually captured CUDA graphs
+                _uncompile_backbone(self.model)
+                self.compiled = False
+                self.use_cuda_graphs = self.device.type == 'cuda'
+                logger.warning(f"torch.compile failed for {self.backbone}, using eager backbone: {e}")
+    
+    def _forward(self, images: List[torch.Tensor], dtype: Optional[torch.dtype] = None) -> List[Dict[str, torch.Tensor]]:
+        """Run the model on images already on the device."""
+        graph_cache = self._cuda_graphs if self.use_cuda_graphs and images[0].is_cuda else None
+        return _forward_fasterrcnn(self.model, images, dtype, graph_cache)
     
-    @torch.no_grad()
-    def predict(self, image: torch.Tensor, confidence_threshold: float = 0.0, best_per_class: bool = True) -> Dict:
+    @torch.inference_mode()
+    def predict(self, image: torch.Tensor, confidence_threshold: float = 0.0, best_per_class: bool = True,
+                dtype: Optional[torch.dtype] = torch.float16) -> Dict:
         """Run inference on a single image.
         
         Args:
             image: Preprocessed image tensor [3, H, W]
             confidence_threshold: Minimum confidence score for predictions
             best_per_class: If True, return only the best prediction per class
+            dtype: Autocast dtype for the backbone on CUDA (None for full FP32)
             
         Returns:
             Dictionary with 'boxes', 'scores', 'labels' arrays
@@ -208,42 +487,36 @@ class KeypointDetector:
         image = image.to(self.device)
         
         # Get predictions
-        predictions = self.model([image])[0]
-        
-        # Filter predictions by confidence
-        keep = predictions['scores'] > confidence_threshold
-        filtered_preds = {
-            'boxes': predictions['boxes'][keep].cpu().numpy(),
-            'scores': predictions['scores'][keep].cpu().numpy(),
-            'labels': predictions['labels'][keep].cpu().numpy()
-        }
-        
-        if best_per_class:
-            unique_labels = np.unique(filtered_preds['labels'])
-            best_indices = []
-            
-            for label in unique_labels:
-                class_mask = filtered_preds['labels'] == label
-                if np.any(class_mask):
-                    class_scores = filtered_preds['scores'][class_mask]
-                    best_idx = np.argmax(class_scores)
-                    original_indices = np.where(class_mask)[0]
-                    best_indices.append(original_indices[best_idx])
+        predictions = self._forward([image], dtype)[0]
+        
+        return _filter_predictions(predictions, confidence_threshold, best_per_class)
+    
+    @torch.inference_mode()
+    def predict_batch(self, images: List[torch.Tensor], confidence_threshold: float = 0.0, best_per_class: bool = True,
+                      dtype: Optional[torch.dtype] = torch.float16) -> List[Dict]:
+        """Run inference on several images in one forward pass.
+        
+        Faster R-CNN's transform resizes and pads the images into a single batch,
+        so per-launch overhead is paid once rather than per image.
+        
+        Args:
+            images: Preprocessed image tensors [3, H, W]
+            confidence_threshold: Minimum confidence score for predictions
+            best_per_class: If True, return only the best prediction per class
+            dtype: Autocast dtype for the backbone on CUDA (None for full FP32)
             
-            if best_indices:
-                filtered_preds = {
-                    'boxes': filtered_preds['boxes'][best_indices],
-                    'scores': filtered_preds['scores'][best_indices],
-                    'labels': filtered_preds['labels'][best_indices]
-                }
-            else:
-                filtered_preds = {
-                    'boxes': np.array([]).reshape(0, 4),
-                    'scores': np.array([]),
-                    'labels': np.array([])
-                }
+        Returns:
+            One dictionary with 'boxes', 'scores', 'labels' arrays per image, in order
+        """
+        if not images:
+            return []
         
-        return filtered_preds
+        self.model.eval()
+        images = [image.to(self.device) for image in images]
+        
+        predictions = self._forward(images, dtype)
+        
+        return [_filter_predictions(p, confidence_threshold, best_per_class) for p in predictions]
 
 
 class FasterRCNNWithKeypointHead(nn.Module):
@@ -270,6 +543,10 @@ class FasterRCNNWithKeypointHead(nn.Module):
             output_size=7,
             sampling_ratio=2
         )
+        
+        # Shared zero offset expanded per prediction at inference; not part of
+        # the checkpoint
+        self.register_buffer('_zero_offset', torch.zeros(1, 2), persistent=False)
     
     def forward(self, images, targets=None):
         """Forward pass - at inference, returns standard FasterRCNN predictions."""
@@ -280,25 +557,30 @@ class FasterRCNNWithKeypointHead(nn.Module):
             # Inference: Just use FasterRCNN predictions
             predictions = self.fasterrcnn(images)
             
-            # Add dummy keypoint offsets (not used at inference)
-            for pred in predictions:
-                pred['keypoint_offsets'] = torch.zeros(
-                    len(pred['boxes']), 2, device=pred['boxes'].device
-                )
-            
-            return predictions
+            return self.add_keypoint_offsets(predictions)
+    
+    def add_keypoint_offsets(self, predictions: List[Dict[str, torch.Tensor]]) -> List[Dict[str, torch.Tensor]]:
+        """Add dummy keypoint offsets (not used at inference) to FasterRCNN predictions, in place.
+        
+        expand() is a stride-0 view, so no per-image allocation.
+        """
+        for pred in predictions:
+            pred['keypoint_offsets'] = self._zero_offset.expand(len(pred['boxes']), 2)
+        
+        return predictions
 
 
 class KeypointDetectorWithSpecializedHead:
     """FasterRCNN with specialized keypoint head (from training code)."""
     
-    def __init__(self, dataset, backbone: str = 'resnet50', weights=None):
+    def __init__(self, dataset, backbone: str = 'resnet50', weights=None, compile: bool = True):
         """Initialize FasterRCNN with specialized keypoint head.
         
         Args:
             dataset: Dataset object with num_classes and num_points attributes
             backbone: Backbone architecture name
             weights: Optional weights to load
+            compile: Compile the backbone with torch.compile (CUDA only)
         """
         self.num_keypoints = dataset.num_points
         self.num_classes = dataset.num_points + 1  # +1 for background
@@ -307,35 +589,61 @@ class KeypointDetectorWithSpecializedHead:
         
         # Build model with specialized keypoint head
         self.model = self._create_model(backbone, self.num_classes, self.num_keypoints)
-        self.model.to(self.device)
+        _move_to_device(self.model, self.device)
+        self.model.eval()
+        
+        # Backbone CUDA graphs per input shape, captured lazily in predict(); not
+        # needed when the compiled backbone replays its own
+        self.compiled = compile and self.device.type == 'cuda' and _compile_backbone(self.model.fasterrcnn, backbone)
+        self.use_cuda_graphs = self.device.type == 'cuda' and not self.compiled
+        self._cuda_graphs = CudaGraphCache()
+    
+    def warmup(self) -> None:
+        """Trigger backbone compilation with a dummy forward (after loading weights)."""
+        if self.compiled:
+            try:
+                self.predict(torch.zeros(3, 512, 512, device=self.device))
+                logger.info(f"Compiled {self.backbone_name} backbone with torch.compile")
+            except Exception as e:
+                # Fall back to the eager backbone with manually captured CUDA graphs
+                _uncompile_backbone(self.model.fasterrcnn)
+                self.compiled = False
+                self.use_cuda_graphs = self.device.type == 'cuda'
+                logger.warning(f"torch.compile failed for {self.backbone_name}, using eager backbone: {e}")
+    
+    def _forward(self, images: List[torch.Tensor], dtype: Optional[torch.dtype] = None) -> List[Dict[str, torch.Tensor]]:
+        """Run the model on images already on the device.
+        
+        Runs the wrapped FasterRCNN through _forward_fasterrcnn (backbone autocast
+        and CUDA graphs), then adds the keypoint offsets as the model's forward does.
+        """
+        graph_cache = self._cuda_graphs if self.use_cuda_graphs and images[0].is_cuda else None
+        predictions = _forward_fasterrcnn(self.model.fasterrcnn, images, dtype, graph_cache)
+        return self.model.add_keypoint_offsets(predictions)
     
     def _create_model(self, backbone: str, num_classes: int, num_keypoints: int):
         """Create FasterRCNN model with specialized keypoint head."""
         
-        # First create base FasterRCNN using KeypointDetector
-        # Create a dummy dataset object
-        class DummyDataset:
-            def __init__(self, num_classes, num_points):
-                self.num_classes = num_classes
-                self.num_points = num_points
-        
-        dummy_dataset = DummyDataset(num_classes, num_keypoints)
-        base_detector = KeypointDetector(dummy_dataset, backbone=backbone)
-        base_model = base_detector.model
+        # Build the base FasterRCNN with the same architecture code as KeypointDetector,
+        # without instantiating a full detector (and moving it to the device) just to
+        # throw the wrapper away
+        base_model = build_fasterrcnn(num_classes, backbone)
         
         # Wrap with specialized keypoint head
         model = FasterRCNNWithKeypointHead(base_model, num_keypoints)
         
         return model
     
-    @torch.no_grad()
-    def predict(self, image: torch.Tensor, confidence_threshold: float = 0.0, best_per_class: bool = True) -> Dict:
+    @torch.inference_mode()
+    def predict(self, image: torch.Tensor, confidence_threshold: float = 0.0, best_per_class: bool = True,
+                dtype: Optional[torch.dtype] = torch.float16) -> Dict:
         """Run inference on a single image.
         
         Args:
             image: Preprocessed image tensor [3, H, W]
             confidence_threshold: Minimum confidence score for predictions
             best_per_class: If True, return only the best prediction per class
+            dtype: Autocast dtype for the backbone on CUDA (None for full FP32)
             
         Returns:
             Dictionary with 'boxes', 'scores', 'labels' arrays
@@ -344,39 +652,6 @@ class KeypointDetectorWithSpecializedHead:
         image = image.to(self.device)
         
         # Get predictions
-        predictions = self.model([image])[0]
-        
-        # Filter predictions by confidence
-        keep = predictions['scores'] > confidence_threshold
-        filtered_preds = {
-            'boxes': predictions['boxes'][keep].cpu().numpy(),
-            'scores': predictions['scores'][keep].cpu().numpy(),
-            'labels': predictions['labels'][keep].cpu().numpy()
-        }
-        
-        if best_per_class:
-            unique_labels = np.unique(filtered_preds['labels'])
-            best_indices = []
-            
-            for label in unique_labels:
-                class_mask = filtered_preds['labels'] == label
-                if np.any(class_mask):
-                    class_scores = filtered_preds['scores'][class_mask]
-                    best_idx = np.argmax(class_scores)
-                    original_indices = np.where(class_mask)[0]
-                    best_indices.append(original_indices[best_idx])
-            
-            if best_indices:
-                filtered_preds = {
-                    'boxes': filtered_preds['boxes'][best_indices],
-                    'scores': filtered_preds['scores'][best_indices],
-                    'labels': filtered_preds['labels'][best_indices]
-                }
-            else:
-                filtered_preds = {
-                    'boxes': np.array([]).reshape(0, 4),
-                    'scores': np.array([]),
-                    'labels': np.array([])
-                }
+        predictions = self._forward([image], dtype)[0]
         
-        return filtered_preds
\ No newline at end of file
+        return _filter_predictions(predictions, confidence_threshold, best_per_class)
\ No newline at end of file
@@ -2,10 +2,40 @@
 Abstract base class for monitoring backends.
 """
 
+import json
 from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+    # numpy arrays natively, non-str dict keys, naive datetimes as UTC
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC
+    _ORJSON_OPTIONS_NEWLINE = _ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 from ..events import MonitoringEvent
 
+
+def serialize_json(obj: Any, append_newline: bool = False, sort_keys: bool = False) -> bytes:
+    """
+    Serialize a monitoring event (or any JSON-like object) to UTF-8 JSON bytes.
+    
+    Uses orjson when installed: one C call, with numpy arrays encoded natively.
+    default=str only catches the remaining non-JSON types. Falls back to stdlib json.
+    sort_keys gives a canonical encoding, e.g. for content hashes.
+    """
+    if ORJSON_AVAILABLE:
+        option = _ORJSON_OPTIONS_NEWLINE if append_newline else _ORJSON_OPTIONS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=str, option=option)
+    data = json.dumps(obj, default=str, sort_keys=sort_keys)
+    if append_newline:
+        data += '\n'
+    return data.encode('utf-8')
+
 class MonitoringBackend(ABC):
     """
     Interface for monitoring backends (e.g., File, InfluxDB, Prometheus).
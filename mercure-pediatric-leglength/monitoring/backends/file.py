@@ -2,23 +2,32 @@
 File-based monitoring backend for storing raw events.
 """
 
-import json
+import atexit
 import logging
 import os
-from datetime import datetime
+import queue
+import threading
+import time
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
-from .base import MonitoringBackend
+from .base import MonitoringBackend, serialize_json
 from ..events import MonitoringEvent
 
 class FileBackend(MonitoringBackend):
     """
-    Writes monitoring events to individual JSON files in a directory structure.
-    Strategy: One file per session to ensure atomic writes and avoid locking issues.
-    Structure: {base_path}/{date}/event_{session_id}.json
+    Appends monitoring events to a daily NDJSON log (one JSON object per line).
+    Strategy: Events are queued and appended in batches by a background thread. The
+    day's file is opened once with O_APPEND, so concurrent writers never interleave
+    partial lines. Up to QUEUE_SIZE queued events can be lost if the process crashes.
+    With config['fsync'] set, each written batch is followed by a single fsync().
+    Structure: {base_path}/{date}/events.ndjson
     """
     
+    QUEUE_SIZE = 1000
+    BATCH_SIZE = 64
+    BATCH_INTERVAL = 0.1  # seconds
+    
     def __init__(self, config: Dict[str, Any], logger: Optional[logging.Logger] = None):
         super().__init__(config)
         self.logger = logger or logging.getLogger(__name__)
@@ -30,6 +39,8 @@ class FileBackend(MonitoringBackend):
         # 3. Default: /var/log/mercure/monitoring_events
         
         self.base_path = Path(config.get('path', os.environ.get('MONITORING_DATA_PATH', '/var/log/mercure/monitoring_events')))
+        # One fsync per written batch rather than per event (off by default)
+        self.fsync = config.get('fsync', False)
         
         # Ensure base directory exists
         try:
@@ -38,41 +49,104 @@ class FileBackend(MonitoringBackend):
         except Exception as e:
             self.logger.error(f"Failed to create monitoring directory {self.base_path}: {e}")
             self.enabled = False
+        
+        # Open descriptor of the current day's log, reopened when the date changes.
+        # Only the writer thread touches it.
+        self._fd: Optional[int] = None
+        self._fd_date: Optional[str] = None
+        
+        # record_event() only enqueues; a daemon thread appends events in batches so
+        # callers never wait on disk I/O (slow or NFS-mounted monitoring volumes)
+        self._queue: queue.Queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+        self._writer: Optional[threading.Thread] = None
+        if self.enabled:
+            self._writer = threading.Thread(target=self._write_loop, name='monitoring-file-writer', daemon=True)
+            self._writer.start()
+            # Drain queued events when the process exits without calling close()
+            atexit.register(self.close)
+
+    def _get_fd(self, date_str: str) -> int:
+        """Return the append-only descriptor for the given day's log."""
+        if self._fd is None or self._fd_date != date_str:
+            self._close_fd()
+            daily_dir = self.base_path / date_str
+            daily_dir.mkdir(exist_ok=True)
+            file_path = daily_dir / 'events.ndjson'
+            self._fd = os.open(file_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._fd_date = date_str
+            self.logger.debug(f"Opened event log {file_path}")
+        return self._fd
+
+    def _close_fd(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+            self._fd_date = None
+
+    def _write_batch(self, batch: List[bytes]) -> None:
+        """Append a batch of serialized events with as few write() calls as possible."""
+        # The log (and its directory) is only reopened when the date changes
+        fd = self._get_fd(time.strftime('%Y-%m-%d'))
+        data = memoryview(b''.join(batch))
+        while data:
+            written = os.write(fd, data)
+            data = data[written:]
+        if self.fsync:
+            os.fsync(fd)
+
+    def _write_loop(self) -> None:
+        """Writer thread: collect up to BATCH_SIZE events or BATCH_INTERVAL seconds, then append."""
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.BATCH_INTERVAL
+            while len(batch) < self.BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            
+            try:
+                self._write_batch(batch)
+                self.logger.debug("Recorded %d events", len(batch))
+            except Exception as e:
+                self.logger.error(f"Failed to write {len(batch)} events: {e}")
+        
+        self._close_fd()
 
     def record_event(self, event: MonitoringEvent) -> bool:
         """
-        Write the event to a unique JSON file.
+        Queue the event for appending to the daily NDJSON log.
+        Returns False if the event could not be serialized or the queue is full.
         """
-        if not self.enabled:
+        if not self.enabled or self._writer is None:
             return False
             
         try:
-            # 1. Get Session ID for filename
-            session_id = event['metadata'].get('session_id', 'unknown_session')
-            # Sanitize session_id for filename (replace slashes, etc if any)
-            safe_session_id = "".join([c for c in session_id if c.isalnum() or c in "._-"])
-            
-            # 2. Create Date-based Directory
-            date_str = datetime.now().strftime('%Y-%m-%d')
-            daily_dir = self.base_path / date_str
-            daily_dir.mkdir(exist_ok=True)
-            
-            # 3. Define File Path
-            filename = f"event_{safe_session_id}.json"
-            file_path = daily_dir / filename
-            
-            # 4. Write Atomic JSON
-            # Use default=str to handle any non-serializable objects gracefully
-            with open(file_path, 'w') as f:
-                json.dump(event, f, indent=2, default=str)
-                
-            self.logger.debug(f"Recorded event to {file_path}")
+            # Serialize now so later changes to the event dict are not recorded
+            self._queue.put_nowait(serialize_json(event, append_newline=True))
             return True
-            
+        except queue.Full:
+            self.logger.warning("Monitoring event queue full, dropping event")
+            return False
         except Exception as e:
-            self.logger.error(f"Failed to write event file: {e}")
+            self.logger.error(f"Failed to queue event: {e}")
             return False
 
     def close(self) -> None:
-        """No persistent connection to close."""
-        pass
+        """Write all queued events and stop the writer thread."""
+        writer, self._writer = self._writer, None
+        if writer is None:
+            return
+        self._queue.put(None)
+        writer.join()
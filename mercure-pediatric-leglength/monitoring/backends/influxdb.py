@@ -0,0 +1,173 @@
+"""
+InfluxDB backend that ships monitoring events in batches.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Optional
+
+import requests
+
+from .base import MonitoringBackend
+from ..events import MonitoringEvent
+
+MEASUREMENT = 'leglength_event'
+
+
+def _escape_tag(value: Any) -> str:
+    """Escape a tag value for InfluxDB line protocol."""
+    return str(value).replace('\\', '\\\\').replace(',', '\\,').replace('=', '\\=').replace(' ', '\\ ')
+
+
+def _format_field(value: Any) -> Optional[str]:
+    """Format a field value for line protocol (None for values that cannot be written)."""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, int):
+        return f"{value}i"
+    if isinstance(value, float):
+        return repr(value)
+    return None
+
+
+def event_to_line(event: MonitoringEvent, timestamp_ns: int) -> str:
+    """
+    Convert a MonitoringEvent to one InfluxDB line-protocol point.
+    
+    Low-cardinality context (status, model, scanner, age group, sex) becomes tags;
+    timings and leg lengths become fields.
+    """
+    metadata = event['metadata']
+    context = event['context']
+    tags = {
+        'status': event['status']['code'],
+        'model_version': metadata.get('model_version'),
+        'scanner_manufacturer': context.get('scanner_manufacturer'),
+        'patient_age_group': context.get('patient_age_group'),
+        'patient_sex': context.get('patient_sex'),
+    }
+    
+    fields = {f"{stage}_seconds": value for stage, value in event['timings'].items() if stage != 'stages'}
+    for side in ('left', 'right'):
+        for name, value in event['derived_results'][side].items():
+            fields[f"{side}_{name}"] = value
+    fields['error_count'] = len(event['status']['errors'])
+    
+    tag_str = ''.join(f",{key}={_escape_tag(value)}" for key, value in tags.items() if value)
+    field_str = ','.join(
+        f"{key}={formatted}" for key, formatted in
+        ((key, _format_field(value)) for key, value in fields.items())
+        if formatted is not None
+    )
+    return f"{MEASUREMENT}{tag_str} {field_str} {timestamp_ns}"
+
+
+class InfluxDBBackend(MonitoringBackend):
+    """
+    Buffers monitoring events and writes them to InfluxDB (v2 /api/v2/write) in batches.
+    Strategy: Events are converted to line protocol on record and queued; a background
+    thread writes them as a single newline-joined POST once batch_size events are
+    pending or batch_interval_s has passed since the last flush, so recording never
+    waits on the network. Pending events are flushed on close() and at exit.
+    """
+    
+    def __init__(self, config: Dict[str, Any], logger: Optional[logging.Logger] = None):
+        super().__init__(config)
+        self.logger = logger or logging.getLogger(__name__)
+        
+        self.write_url = f"{config['url'].rstrip('/')}/api/v2/write"
+        self.params = {'org': config['org'], 'bucket': config['bucket'], 'precision': 'ns'}
+        self.timeout = config.get('timeout', 5)
+        self.batch_size = config.get('batch_size', 500)
+        self.batch_interval_s = config.get('batch_interval_s', 5.0)
+        
+        self._session = requests.Session()
+        self._session.headers['Authorization'] = f"Token {config['token']}"
+        self._pending: deque = deque()
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+        
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        if self.enabled:
+            self._flusher = threading.Thread(target=self._flush_loop, name='monitoring-influxdb-flusher', daemon=True)
+            self._flusher.start()
+        
+        atexit.register(self.close)
+        self.logger.info(f"InfluxDBBackend initialized for {self.write_url} (batch size {self.batch_size})")
+    
+    def record_event(self, event: MonitoringEvent) -> bool:
+        """
+        Queue the event and wake the flusher thread if the batch is full or due.
+        """
+        if not self.enabled:
+            return False
+        
+        try:
+            line = event_to_line(event, time.time_ns())
+        except Exception as e:
+            self.logger.error(f"Failed to convert event to line protocol: {e}")
+            return False
+        
+        with self._lock:
+            self._pending.append(line)
+            due = self._due()
+        if due:
+            self._wake.set()
+        return True
+    
+    def _due(self) -> bool:
+        """Whether the pending batch is full or old enough to write (lock held)."""
+        return bool(self._pending) and (
+            len(self._pending) >= self.batch_size or time.time() - self._last_flush >= self.batch_interval_s
+        )
+    
+    def _flush_loop(self) -> None:
+        """Flusher thread: write the pending batch when woken by record_event() or once it is due."""
+        while not self._stop.is_set():
+            self._wake.wait(self.batch_interval_s / 2)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            with self._lock:
+                due = self._due()
+            if due:
+                self._flush()
+    
+    def _flush(self) -> bool:
+        """Write all pending lines in one request.
+        
+        The batch is swapped out under the lock and POSTed outside it, so
+        record_event() never blocks on the network.
+        """
+        with self._lock:
+            self._last_flush = time.time()
+            if not self._pending:
+                return True
+            lines = self._pending
+            self._pending = deque()
+        
+        try:
+            response = self._session.post(
+                self.write_url, params=self.params, data='\n'.join(lines).encode('utf-8'), timeout=self.timeout
+            )
+            response.raise_for_status()
+            self.logger.debug(f"Wrote {len(lines)} events to InfluxDB")
+            return True
+        except Exception as e:
+            self.logger.error(f"Failed to write {len(lines)} events to InfluxDB: {e}")
+            return False
+    
+    def close(self) -> None:
+        """Stop the flusher thread, flush pending events and close the HTTP session."""
+        self._stop.set()
+        self._wake.set()
+        if self._flusher is not None and self._flusher is not threading.current_thread():
+            # Let an in-flight write finish so the final flush does not race it
+            self._flusher.join(timeout=self.timeout + 1)
+        self._flush()
+        self._session.close()
@@ -2,12 +2,12 @@
 Backend for writing Mercure result.json file.
 """
 
-import json
 import logging
+import os
 from pathlib import Path
 from typing import Dict, Any, Optional
 
-from .base import MonitoringBackend
+from .base import MonitoringBackend, serialize_json
 from ..events import MonitoringEvent, MercureResult
 
 class MercureResultBackend(MonitoringBackend):
@@ -21,6 +21,7 @@ class MercureResultBackend(MonitoringBackend):
         self.logger = logger or logging.getLogger(__name__)
         # The output directory is passed in the config, usually from run.py arguments
         self.output_dir = Path(config.get('output_dir', '.'))
+        self.result_path = self.output_dir / 'result.json'
         
     def record_event(self, event: MonitoringEvent) -> bool:
         """
@@ -30,8 +31,6 @@ class MercureResultBackend(MonitoringBackend):
             return False
             
         try:
-            result_path = self.output_dir / 'result.json'
-            
             # Construct the Mercure result object
             # We wrap the full event inside, so Mercure archives everything
             mercure_result: MercureResult = {
@@ -62,11 +61,14 @@ class MercureResultBackend(MonitoringBackend):
                         'status': 'info'
                     }
 
-            # Write to file
-            with open(result_path, 'w') as f:
-                json.dump(mercure_result, f, default=str)
+            # Write to a temporary file and rename it into place, so Mercure never
+            # picks up a partially written result.json
+            tmp_path = self.result_path.with_name(self.result_path.name + '.tmp')
+            with open(tmp_path, 'wb') as f:
+                f.write(serialize_json(mercure_result))
+            os.replace(tmp_path, self.result_path)
                 
-            self.logger.debug(f"Wrote Mercure result.json to {result_path}")
+            self.logger.debug(f"Wrote Mercure result.json to {self.result_path}")
             return True
             
         except Exception as e:
@@ -1,16 +1,18 @@
 """
-Metrics collector that formats data for both InfluxDB and Prometheus backends.
+Metrics collector that builds MonitoringEvents from per-session data.
 """
 
+import functools
+from collections import deque
+from dataclasses import dataclass, field
 import logging
+import math
+import sys
+import threading
 import time
 from typing import Dict, Any, List, Optional
-from datetime import datetime
 import psutil
 import os
-import calendar
-import numpy as np
-import uuid
 
 from .events import MonitoringEvent, Metadata, Context, Timings, ModelPrediction, DerivedResults, Status, LegResults
 
@@ -27,8 +29,166 @@ except ImportError:
     PYDICOM_AVAILABLE = False
 
 
+# Temporal tag lookup tables (indexed by tm_wday, tm_mon - 1, (tm_mday - 1) // 7 and tm_hour)
+_DAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+_MONTHS = ('january', 'february', 'march', 'april', 'may', 'june',
+           'july', 'august', 'september', 'october', 'november', 'december')
+_WEEKS_OF_MONTH = tuple(f"week{week}" for week in range(1, 6))
+_HOUR_TO_TIME_OF_DAY = tuple(
+    'morning' if 6 <= hour < 12 else
+    'afternoon' if 12 <= hour < 18 else
+    'evening' if 18 <= hour < 24 else
+    'night'
+    for hour in range(24)
+)
+
+# Shared default for missing prediction arrays (serializes as [])
+_EMPTY = ()
+
+# ISO 8601 local-time timestamp format for event metadata (microseconds appended)
+_TS_FMT = '%Y-%m-%dT%H:%M:%S'
+
+# (measurement key, LegResults key) pairs per side, e.g. ('left_femur_length', 'femur_length_mm')
+_LEG_BONES = ('femur', 'tibia', 'total')
+_LEG_KEYS = {
+    side: tuple((f'{side}_{bone}_length', f'{bone}_length_mm') for bone in _LEG_BONES)
+    for side in ('left', 'right')
+}
+
+# Tag values repeated in every event share one string object
+_UNKNOWN = sys.intern('unknown')
+
+
+def _intern_str(value: Any) -> str:
+    """str() a DICOM value and intern it."""
+    return sys.intern(str(value))
+
+
+def _intern_upper(value: Any) -> str:
+    """Upper-case a DICOM value and intern it."""
+    return sys.intern(str(value).upper())
+
+
+# DICOM tags read by _read_dicom_metadata
+_PATIENT_AGE = 0x00101010
+_PIXEL_SPACING = 0x00280030
+_ROWS = 0x00280010
+_COLUMNS = 0x00280011
+
+# Plain string elements: (tag, metadata key, default, transform).
+# Low-cardinality values are interned; per-study identifiers are not.
+_DICOM_STRING_FIELDS = (
+    (0x00100020, 'patient_id', _UNKNOWN, str),                   # PatientID
+    (0x00100040, 'patient_gender', _UNKNOWN, _intern_upper),     # PatientSex
+    (0x0020000D, 'study_id', _UNKNOWN, str),                     # StudyInstanceUID
+    (0x0020000E, 'series_id', _UNKNOWN, str),                    # SeriesInstanceUID
+    (0x00080050, 'accession_number', _UNKNOWN, str),             # AccessionNumber
+    (0x00080070, 'scanner_manufacturer', _UNKNOWN, _intern_str), # Manufacturer
+)
+
+_DICOM_TAGS = [field[0] for field in _DICOM_STRING_FIELDS] + [_PATIENT_AGE, _PIXEL_SPACING, _ROWS, _COLUMNS]
+
+
+def _format_timestamp(now: float) -> str:
+    """
+    Format an epoch time as a naive local ISO 8601 string, e.g. '2024-01-31T14:05:09.123456'.
+    
+    Same output as datetime.fromtimestamp(now).isoformat(), which event consumers
+    expect, without building a datetime per event.
+    """
+    # Split and round like datetime.fromtimestamp
+    fraction, seconds = math.modf(now)
+    micros = round(fraction * 1_000_000)
+    if micros == 1_000_000:
+        seconds, micros = seconds + 1, 0
+    formatted = time.strftime(_TS_FMT, time.localtime(seconds))
+    return f"{formatted}.{micros:06d}" if micros else formatted
+
+
+@functools.lru_cache(maxsize=256)
+def _read_dicom_metadata(dicom_path: str, mtime: float) -> Dict[str, Any]:
+    """
+    Read the tagging metadata from a DICOM header.
+    
+    Memoized per (path, mtime): the same file is recorded by several calls per
+    session, and a rewritten file gets a new mtime and is re-read.
+    """
+    metadata = {}
+    
+    # Only decode the elements we tag with; pydicom skips the rest of the header
+    ds = pydicom.dcmread(dicom_path, stop_before_pixels=True, specific_tags=_DICOM_TAGS)
+    
+    # Patient, study, series and scanner identifiers (integer tags skip pydicom's keyword lookup)
+    for tag, key, default, transform in _DICOM_STRING_FIELDS:
+        elem = ds.get(tag)
+        metadata[key] = transform(elem.value) if elem is not None and elem.value is not None else default
+    
+    # Calculate age group from patient age
+    elem = ds.get(_PATIENT_AGE)
+    patient_age = elem.value if elem is not None else None
+    if patient_age:
+        try:
+            # PatientAge format: "025Y" or "030M" etc.
+            age_value = int(patient_age[:3])
+            age_unit = patient_age[3]
+            
+            if age_unit == 'Y':  # Years
+                age_years = age_value
+            elif age_unit == 'M':  # Months
+                age_years = age_value / 12
+            else:
+                age_years = None
+                
+            if age_years is not None:
+                metadata['patient_age'] = int(age_years)
+                if age_years <= 2:
+                    metadata['patient_age_group'] = '0-2'
+                elif age_years <= 8:
+                    metadata['patient_age_group'] = '2-8'
+                elif age_years <= 18:
+                    metadata['patient_age_group'] = '8-18'
+                else:
+                    metadata['patient_age_group'] = '18+'
+            else:
+                metadata['patient_age_group'] = _UNKNOWN
+                
+        except (ValueError, IndexError):
+            metadata['patient_age_group'] = _UNKNOWN
+    else:
+        metadata['patient_age_group'] = _UNKNOWN
+    
+    # Pixel spacing
+    elem = ds.get(_PIXEL_SPACING)
+    metadata['pixel_spacing'] = float(elem.value[0]) if elem is not None and elem.value else 0.0
+    
+    # Image size (rows, columns)
+    rows, columns = ds.get(_ROWS), ds.get(_COLUMNS)
+    if rows is not None and columns is not None:
+        metadata['image_size'] = [int(rows.value), int(columns.value)]
+    
+    return metadata
+
+
+@dataclass(slots=True)
+class SessionState:
+    """Metrics collected for one session between start_session() and cleanup_session()."""
+    session_id: str
+    config: Dict[str, Any]
+    accession: Optional[str]
+    start_time: float
+    system_metrics: deque
+    timings: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    model_metrics: Dict[str, Any] = field(default_factory=dict)
+    measurements: Dict[str, Any] = field(default_factory=dict)
+    performance_data: Dict[str, Any] = field(default_factory=dict)
+    custom_metrics: Optional[deque] = None
+    dicom_path: Optional[str] = None
+    dicom_metadata: Optional[Dict[str, Any]] = None
+    status: str = 'started'
+
+
 class MetricsCollector:
-    """Collects and formats metrics for both InfluxDB and Prometheus."""
+    """Collects per-session metrics and turns them into MonitoringEvents."""
     
     def __init__(self, config: Dict[str, Any], logger: logging.Logger):
         """
@@ -40,118 +200,85 @@ class MetricsCollector:
         """
         self.logger = logger
         self.config = config
-        self.sessions: Dict[str, Dict[str, Any]] = {}
+        self.sessions: Dict[str, SessionState] = {}
         
         # Configuration options
         self.include_system_metrics = config.get('include_system_metrics', True)
         self.include_model_metrics = config.get('include_model_metrics', True)
         self.collection_interval = config.get('collection_interval', 10)
+        # Samples kept per session (720 = 2h at the default 10s interval); older ones are dropped
+        self.system_metrics_ring = config.get('system_metrics_ring', 720)
         
         # System monitoring
         self.process = psutil.Process()
+        # Disk usage changes slowly; refresh it every Nth sample only
+        self.disk_sample_every = max(1, config.get('disk_sample_every', 6))
+        self._disk_root = '/'
+        self._disk_usage = None
+        self._samples_taken = 0
+        
+        # CUDA devices and their metric keys are fixed for the process lifetime
+        try:
+            self._cuda_devices = list(range(torch.cuda.device_count())) if TORCH_AVAILABLE and torch.cuda.is_available() else []
+        except Exception as e:
+            self.logger.debug(f"Failed to enumerate CUDA devices: {e}")
+            self._cuda_devices = []
+        self._gpu_keys = [
+            (i, f'gpu_{i}_memory_allocated_mb', f'gpu_{i}_memory_reserved_mb')
+            for i in self._cuda_devices
+        ]
+        
+        # System metrics are sampled once per collection_interval by a background thread;
+        # sessions copy the latest sample instead of issuing their own psutil syscalls
+        self._sample_lock = threading.Lock()
+        self._last_system_sample: Dict[str, Any] = {}
+        self._sampler_stop = threading.Event()
+        self._sampler_thread: Optional[threading.Thread] = None
+        if self.include_system_metrics:
+            self._last_system_sample = self._sample_system_metrics()
+            self._sampler_thread = threading.Thread(
+                target=self._sampler_loop, name='system-metrics-sampler', daemon=True
+            )
+            self._sampler_thread.start()
         
         self.logger.debug("Metrics collector initialized")
     
     def _extract_dicom_metadata(self, dicom_path: str) -> Dict[str, Any]:
         """Extract metadata from DICOM file for tagging."""
-        metadata = {}
-        
         if not PYDICOM_AVAILABLE:
-            return metadata
+            return {}
             
         try:
-            ds = pydicom.dcmread(dicom_path, stop_before_pixels=True)
-            
-            # Patient information
-            metadata['patient_id'] = getattr(ds, 'PatientID', 'unknown')
-            metadata['patient_gender'] = getattr(ds, 'PatientSex', 'unknown').upper()
-            
-            # Calculate age group from patient age
-            patient_age = getattr(ds, 'PatientAge', None)
-            if patient_age:
-                try:
-                    # PatientAge format: "025Y" or "030M" etc.
-                    age_value = int(patient_age[:3])
-                    age_unit = patient_age[3]
-                    
-                    if age_unit == 'Y':  # Years
-                        age_years = age_value
-                    elif age_unit == 'M':  # Months
-                        age_years = age_value / 12
-                    else:
-                        age_years = None
-                        
-                    if age_years is not None:
-                        metadata['patient_age'] = int(age_years)
-                        if age_years <= 2:
-                            metadata['patient_age_group'] = '0-2'
-                        elif age_years <= 8:
-                            metadata['patient_age_group'] = '2-8'
-                        elif age_years <= 18:
-                            metadata['patient_age_group'] = '8-18'
-                        else:
-                            metadata['patient_age_group'] = '18+'
-                    else:
-                        metadata['patient_age_group'] = 'unknown'
-                        
-                except (ValueError, IndexError):
-                    metadata['patient_age_group'] = 'unknown'
-            else:
-                metadata['patient_age_group'] = 'unknown'
-            
-            # Study and series information
-            metadata['study_id'] = getattr(ds, 'StudyInstanceUID', 'unknown')
-            metadata['series_id'] = getattr(ds, 'SeriesInstanceUID', 'unknown')
-            metadata['accession_number'] = getattr(ds, 'AccessionNumber', 'unknown')
-            
-            # Scanner information
-            metadata['scanner_manufacturer'] = getattr(ds, 'Manufacturer', 'unknown')
-            metadata['pixel_spacing'] = float(getattr(ds, 'PixelSpacing', [0.0, 0.0])[0])
-            
+            # Copy so callers cannot modify the cached entry
+            return dict(_read_dicom_metadata(dicom_path, os.path.getmtime(dicom_path)))
         except Exception as e:
             self.logger.debug(f"Failed to extract DICOM metadata: {e}")
-            
-        return metadata
+            return {}
+    
+    def _record_dicom_metadata(self, session: SessionState, dicom_path: str) -> None:
+        """Store DICOM metadata on the session, parsing each file at most once per session."""
+        if session.dicom_path == dicom_path and session.dicom_metadata is not None:
+            return
+        session.dicom_path = dicom_path
+        session.dicom_metadata = self._extract_dicom_metadata(dicom_path)
     
     def _get_temporal_tags(self, timestamp: float) -> Dict[str, str]:
         """Generate temporal tags from timestamp."""
-        dt = datetime.fromtimestamp(timestamp)
-        
-        # Time of day
-        hour = dt.hour
-        if 6 <= hour < 12:
-            time_of_day = 'morning'
-        elif 12 <= hour < 18:
-            time_of_day = 'afternoon'
-        elif 18 <= hour < 24:
-            time_of_day = 'evening'
-        else:
-            time_of_day = 'night'
-        
-        # Day type
-        day_type = 'weekend' if dt.weekday() >= 5 else 'weekday'
+        t = time.localtime(timestamp)
+        weekday = t.tm_wday
         
         # Week of month (1-based)
-        week_of_month = f"week{((dt.day - 1) // 7) + 1}"
+        week_of_month = _WEEKS_OF_MONTH[(t.tm_mday - 1) // 7]
         
         return {
-            'time_of_day': time_of_day,
-            'day_of_week': dt.strftime('%A').lower(),
+            'time_of_day': _HOUR_TO_TIME_OF_DAY[t.tm_hour],
+            'day_of_week': _DAYS[weekday],
             'week_of_month': week_of_month,
-            'month': dt.strftime('%B').lower(),
-            'year': str(dt.year),
-            'day_type': day_type
+            'month': _MONTHS[t.tm_mon - 1],
+            'year': str(t.tm_year),
+            'day_type': 'weekend' if weekday >= 5 else 'weekday'
         }
     
-    def _extract_table_level_features(self, individual_preds: Dict[str, Any], 
-                                     models: List[str], 
-                                     pixel_spacing: float) -> Dict[str, float]:
-        """
-        DEPRECATED: Extract table-level quality features.
-        Retained for backward compatibility.
-        """
-        return {}
-    
     def start_session(self, session_id: str, config: Dict[str, Any]) -> None:
         """
         Start collecting metrics for a session.
@@ -160,23 +287,19 @@ class MetricsCollector:
             session_id: Unique session identifier
             config: Session configuration
         """
-        self.sessions[session_id] = {
-            'session_id': session_id,
-            'start_time': time.time(),
-            'config': config,
-            'timings': {},
-            'metrics': {},
-            'system_metrics': [],
-            'model_metrics': {},
-            'measurements': {},
-            'status': 'started'
-        }
+        self.sessions[session_id] = SessionState(
+            session_id=session_id,
+            config=config,
+            accession=config.get('accession_number'),
+            start_time=time.time(),
+            system_metrics=deque(maxlen=self.system_metrics_ring)
+        )
         
         # Collect initial system metrics
         if self.include_system_metrics:
             self._collect_system_metrics(session_id)
         
-        self.logger.debug(f"Started metrics collection for session {session_id}")
+        self.logger.debug("Started metrics collection for session %s", session_id)
     
     def record_timing(self, session_id: str, stage: str, duration: float) -> None:
         """
@@ -187,15 +310,16 @@ class MetricsCollector:
             stage: Processing stage name
             duration: Duration in seconds
         """
-        if session_id not in self.sessions:
+        session = self.sessions.get(session_id)
+        if session is None:
             return
         
-        self.sessions[session_id]['timings'][stage] = {
+        session.timings[stage] = {
             'duration': duration,
             'timestamp': time.time()
         }
         
-        self.logger.debug(f"Recorded timing {stage}: {duration:.2f}s")
+        self.logger.debug("Recorded timing %s: %.2fs", stage, duration)
     
     def record_model_metrics(self, session_id: str, model_name: str, 
                            metrics: Dict[str, Any]) -> None:
@@ -207,15 +331,16 @@ class MetricsCollector:
             model_name: Name of the model
             metrics: Dictionary of model metrics
         """
-        if session_id not in self.sessions or not self.include_model_metrics:
+        session = self.sessions.get(session_id)
+        if session is None or not self.include_model_metrics:
             return
         
-        self.sessions[session_id]['model_metrics'][model_name] = {
+        session.model_metrics[model_name] = {
             'timestamp': time.time(),
             'metrics': metrics
         }
         
-        self.logger.debug(f"Recorded model metrics for {model_name}")
+        self.logger.debug("Recorded model metrics for %s", model_name)
     
     def record_measurements(self, session_id: str, measurements: Dict[str, Any], 
                            dicom_path: str = None) -> None:
@@ -227,14 +352,15 @@ class MetricsCollector:
             measurements: Dictionary of measurements
             dicom_path: Path to DICOM file for metadata extraction
         """
-        if session_id not in self.sessions:
+        session = self.sessions.get(session_id)
+        if session is None:
             return
         
-        self.sessions[session_id]['measurements'] = measurements
+        session.measurements = measurements
         if dicom_path:
-            self.sessions[session_id]['dicom_path'] = dicom_path
+            self._record_dicom_metadata(session, dicom_path)
             
-        self.logger.debug(f"Recorded {len(measurements)} measurements")
+        self.logger.debug("Recorded %d measurements", len(measurements))
     
     def record_performance_data(self, session_id: str, performance_data: Dict[str, Any],
                                dicom_path: str = None) -> None:
@@ -246,14 +372,15 @@ class MetricsCollector:
             performance_data: Dictionary containing uncertainties and point statistics
             dicom_path: Path to DICOM file for metadata extraction
         """
-        if session_id not in self.sessions:
+        session = self.sessions.get(session_id)
+        if session is None:
             return
             
-        self.sessions[session_id]['performance_data'] = performance_data
+        session.performance_data = performance_data
         if dicom_path:
-            self.sessions[session_id]['dicom_path'] = dicom_path
+            self._record_dicom_metadata(session, dicom_path)
             
-        self.logger.debug(f"Recorded performance data with {len(performance_data.get('uncertainties', {}))} points")
+        self.logger.debug("Recorded performance data with %d points", len(performance_data.get('uncertainties', {})))
     
     def record_custom_metric(self, session_id: str, name: str, value: Any, 
                            tags: Optional[Dict[str, str]] = None) -> None:
@@ -266,36 +393,52 @@ class MetricsCollector:
             value: Metric value
             tags: Optional tags
         """
-        if session_id not in self.sessions:
+        session = self.sessions.get(session_id)
+        if session is None:
             return
         
-        if 'custom_metrics' not in self.sessions[session_id]:
-            self.sessions[session_id]['custom_metrics'] = []
+        if session.custom_metrics is None:
+            session.custom_metrics = deque(maxlen=self.system_metrics_ring)
         
-        self.sessions[session_id]['custom_metrics'].append({
+        session.custom_metrics.append({
             'name': name,
             'value': value,
             'tags': tags or {},
             'timestamp': time.time()
         })
         
-        self.logger.debug(f"Recorded custom metric {name}: {value}")
+        self.logger.debug("Recorded custom metric %s: %s", name, value)
     
-    def _collect_system_metrics(self, session_id: str) -> None:
-        """Collect current system metrics."""
-        if session_id not in self.sessions:
-            return
-        
+    def _sampler_loop(self) -> None:
+        """Refresh the shared system metrics sample every collection_interval seconds."""
+        while not self._sampler_stop.wait(self.collection_interval):
+            sample = self._sample_system_metrics()
+            if sample:
+                with self._sample_lock:
+                    self._last_system_sample = sample
+    
+    def stop_sampler(self) -> None:
+        """Stop the background system metrics sampler."""
+        self._sampler_stop.set()
+        if self._sampler_thread is not None:
+            self._sampler_thread.join(timeout=1.0)
+    
+    def _sample_system_metrics(self) -> Dict[str, Any]:
+        """Read current process, system and GPU metrics (empty dict on failure)."""
         try:
-            # CPU and memory metrics
-            cpu_percent = self.process.cpu_percent()
-            memory_info = self.process.memory_info()
+            # CPU and memory metrics (oneshot reads /proc/<pid> once for both)
+            with self.process.oneshot():
+                cpu_percent = self.process.cpu_percent()
+                memory_info = self.process.memory_info()
             memory_mb = memory_info.rss / (1024 * 1024)
             
             # System-wide metrics
             system_cpu = psutil.cpu_percent()
             system_memory = psutil.virtual_memory()
-            disk_usage = psutil.disk_usage('/')
+            if self._disk_usage is None or self._samples_taken % self.disk_sample_every == 0:
+                self._disk_usage = psutil.disk_usage(self._disk_root)
+            self._samples_taken += 1
+            disk_usage = self._disk_usage
             
             # GPU metrics if available
             gpu_metrics = self._get_gpu_metrics()
@@ -314,28 +457,40 @@ class MetricsCollector:
             if gpu_metrics:
                 system_data.update(gpu_metrics)
             
-            self.sessions[session_id]['system_metrics'].append(system_data)
+            return system_data
             
         except Exception as e:
             self.logger.debug(f"Failed to collect system metrics: {e}")
+            return {}
+    
+    def _collect_system_metrics(self, session_id: str) -> None:
+        """Append the latest background system metrics sample to the session."""
+        session = self.sessions.get(session_id)
+        if session is None:
+            return
+        
+        with self._sample_lock:
+            sample = self._last_system_sample
+        if sample:
+            session.system_metrics.append(sample.copy())
     
     def _get_gpu_metrics(self) -> Dict[str, Any]:
         """Get GPU metrics if available."""
         gpu_metrics = {}
+        if not self._gpu_keys:
+            return gpu_metrics
         
         try:
-            if TORCH_AVAILABLE and torch.cuda.is_available():
-                for i in range(torch.cuda.device_count()):
-                    # Memory usage
-                    memory_allocated = torch.cuda.memory_allocated(i) / (1024**2)  # MB
-                    memory_reserved = torch.cuda.memory_reserved(i) / (1024**2)   # MB
-                    
-                    gpu_metrics[f'gpu_{i}_memory_allocated_mb'] = memory_allocated
-                    gpu_metrics[f'gpu_{i}_memory_reserved_mb'] = memory_reserved
-                    
-                    # Temperature and utilization would require nvidia-ml-py
-                    # Not including to keep dependencies minimal
-                    
+            memory_allocated = torch.cuda.memory_allocated
+            memory_reserved = torch.cuda.memory_reserved
+            for i, allocated_key, reserved_key in self._gpu_keys:
+                # Memory usage (MB)
+                gpu_metrics[allocated_key] = memory_allocated(i) / (1024**2)
+                gpu_metrics[reserved_key] = memory_reserved(i) / (1024**2)
+                
+                # Temperature and utilization would require nvidia-ml-py
+                # Not including to keep dependencies minimal
+                
         except Exception as e:
             self.logger.debug(f"Failed to collect GPU metrics: {e}")
         
@@ -352,42 +507,43 @@ class MetricsCollector:
         Returns:
             MonitoringEvent or None if session not found
         """
-        if session_id not in self.sessions:
+        session = self.sessions.get(session_id)
+        if session is None:
             return None
         
-        session = self.sessions[session_id]
-            config = session.get('config', {})
-            dicom_path = session.get('dicom_path')
-            
-            # Extract DICOM metadata
-            dicom_metadata = {}
-            if dicom_path:
-                dicom_metadata = self._extract_dicom_metadata(dicom_path)
-            
+        config = session.config or {}
+        timings_data = session.timings
+        performance_data = session.performance_data or {}
+        individual_preds = performance_data.get('individual_model_predictions') or {}
+        measurements = session.measurements or {}
+        
+        # DICOM metadata is extracted when the file is recorded
+        dicom_metadata = session.dicom_metadata or {}
+        pixel_spacing = dicom_metadata.get('pixel_spacing', 0.0)
+        
         # 1. Metadata
         metadata: Metadata = {
-            'event_id': str(uuid.uuid4()),
+            'event_id': os.urandom(16).hex(),
             'session_id': session_id,
-            'timestamp': datetime.fromtimestamp(time.time()).isoformat(),
+            'timestamp': _format_timestamp(time.time()),
             'app_version': '0.2.0',  # Ideally this should come from config or package
-            'model_version': '_'.join(config.get('models', ['unknown'])),
+            'model_version': '_'.join(config.get('models', [_UNKNOWN])),
             'config_snapshot': config
         }
         
         # 2. Context
         context: Context = {
-            'scanner_manufacturer': dicom_metadata.get('scanner_manufacturer', 'unknown'),
-            'pixel_spacing': [dicom_metadata.get('pixel_spacing', 0.0), dicom_metadata.get('pixel_spacing', 0.0)],
-            'image_size': [0, 0], # TODO: We need to capture image size
-            'patient_age_group': dicom_metadata.get('patient_age_group', 'unknown'),
-            'patient_sex': dicom_metadata.get('patient_gender', 'unknown'),
-                'study_id': dicom_metadata.get('study_id', 'unknown'),
-                'series_id': dicom_metadata.get('series_id', 'unknown'),
-            'accession_number': dicom_metadata.get('accession_number', 'unknown')
+            'scanner_manufacturer': dicom_metadata.get('scanner_manufacturer', _UNKNOWN),
+            'pixel_spacing': [pixel_spacing, pixel_spacing],
+            'image_size': dicom_metadata.get('image_size', [0, 0]),
+            'patient_age_group': dicom_metadata.get('patient_age_group', _UNKNOWN),
+            'patient_sex': dicom_metadata.get('patient_gender', _UNKNOWN),
+            'study_id': dicom_metadata.get('study_id', _UNKNOWN),
+            'series_id': dicom_metadata.get('series_id', _UNKNOWN),
+            'accession_number': dicom_metadata.get('accession_number', _UNKNOWN)
         }
         
         # 3. Timings
-        timings_data = session.get('timings', {})
         timings: Timings = {
             'total_processing': timings_data.get('total_processing', {}).get('duration', 0.0),
             'inference': timings_data.get('inference', {}).get('duration', 0.0),
@@ -397,28 +553,25 @@ class MetricsCollector:
         }
         
         # 4. Raw Predictions
-                        performance_data = session.get('performance_data', {})
-        individual_preds = performance_data.get('individual_model_predictions', {})
-        raw_predictions: Dict[str, ModelPrediction] = {}
-        
-        for model_name, pred_data in individual_preds.items():
-            predictions = pred_data.get('predictions', {})
-            raw_predictions[model_name] = {
-                'boxes': predictions.get('boxes', []),
-                'labels': predictions.get('labels', []),
-                'scores': predictions.get('scores', [])
+        raw_predictions: Dict[str, ModelPrediction] = {
+            model_name: {
+                'boxes': predictions.get('boxes', _EMPTY),
+                'labels': predictions.get('labels', _EMPTY),
+                'scores': predictions.get('scores', _EMPTY)
             }
-            
-        # 5. Derived Results
-        measurements = session.get('measurements', {})
+            for model_name, predictions in (
+                (model_name, pred_data.get('predictions') or {}) for model_name, pred_data in individual_preds.items()
+            )
+        }
         
+        # 5. Derived Results
         # Helper to extract leg measurements safely
         def get_leg_measurements(side_prefix: str) -> LegResults:
-            return {
-                'femur_length_mm': measurements.get(f'{side_prefix}_femur_length', {}).get('millimeters') if isinstance(measurements.get(f'{side_prefix}_femur_length'), dict) else None,
-                'tibia_length_mm': measurements.get(f'{side_prefix}_tibia_length', {}).get('millimeters') if isinstance(measurements.get(f'{side_prefix}_tibia_length'), dict) else None,
-                'total_length_mm': measurements.get(f'{side_prefix}_total_length', {}).get('millimeters') if isinstance(measurements.get(f'{side_prefix}_total_length'), dict) else None,
-            }
+            leg_results = {}
+            for measurement_key, result_key in _LEG_KEYS[side_prefix]:
+                value = measurements.get(measurement_key)
+                leg_results[result_key] = value.get('millimeters') if isinstance(value, dict) else None
+            return leg_results
 
         derived_results: DerivedResults = {
             'left': get_leg_measurements('left'), # Assuming keys like 'left_femur_length'
@@ -450,20 +603,6 @@ class MetricsCollector:
             'status': status_obj
         }
 
-    def get_influx_data(self, session_id: str) -> List[Dict[str, Any]]:
-        """
-        DEPRECATED: Format session data for InfluxDB.
-        Retained for backward compatibility if InfluxDB client is re-added.
-        """
-        return []
-    
-    def get_prometheus_data(self, session_id: str) -> Dict[str, Any]:
-        """
-        DEPRECATED: Format session data for Prometheus.
-        Retained for backward compatibility if Prometheus client is re-added.
-        """
-            return {}
-    
     def cleanup_session(self, session_id: str) -> None:
         """
         Clean up session data.
@@ -471,9 +610,8 @@ class MetricsCollector:
         Args:
             session_id: Session identifier
         """
-        if session_id in self.sessions:
-            del self.sessions[session_id]
-            self.logger.debug(f"Cleaned up session {session_id}")
+        if self.sessions.pop(session_id, None) is not None:
+            self.logger.debug("Cleaned up session %s", session_id)
     
     def get_active_sessions(self) -> List[str]:
         """Get list of active session IDs."""
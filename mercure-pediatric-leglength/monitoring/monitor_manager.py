@@ -2,9 +2,11 @@
 Main monitoring coordinator.
 """
 
+import inspect
+import itertools
 import logging
 import time
-from typing import Dict, Any, Optional
+from typing import TYPE_CHECKING, Dict, Any, Optional
 from .config_validator import validate_monitoring_config
 from .exceptions import ConfigurationError
 from .backends.file import FileBackend
@@ -12,6 +14,20 @@ from .backends.mercure import MercureResultBackend
 from .backends.base import MonitoringBackend
 from .metrics_collector import MetricsCollector
 
+if TYPE_CHECKING:
+    from .backends.influxdb import InfluxDBBackend
+
+# Per-stage recording methods that become no-ops on a disabled manager
+_HOT_PATH_METHODS = (
+    'track_processing_time', 'record_metrics', 'record_model_performance',
+    'record_measurements', 'record_performance_data', 'end_session',
+)
+
+
+def _noop(*args: Any, **kwargs: Any) -> None:
+    """Stand-in for recording methods while monitoring is disabled."""
+    return None
+
 
 class MonitorManager:
     """
@@ -21,6 +37,9 @@ class MonitorManager:
     - Graceful degradation when monitoring is unavailable
     - Configuration-driven initialization
     - Minimal performance impact on main application
+    
+    The configuration is validated up front, but the metrics collector and backends
+    are only constructed when the first session starts.
     """
     
     def __init__(self, config: Dict[str, Any], logger: logging.Logger):
@@ -35,14 +54,38 @@ class MonitorManager:
         self.enabled = False
         self.file_backend: Optional[FileBackend] = None
         self.mercure_backend: Optional[MercureResultBackend] = None
+        self.influxdb_backend: Optional['InfluxDBBackend'] = None
         self.metrics_collector: Optional[MetricsCollector] = None
+        # Collector entry points resolved once when the collector is built
+        self._measurements_take_dicom_path = False
+        self._record_performance_data = None
+        
+        # Session id suffixes: seeded from the wall clock once, then counted up,
+        # so ids stay unique within the process without a clock read per session
+        self._session_counter = itertools.count(int(time.time()))
         
-        # Initialize monitoring if configuration is present
-        self._initialize_monitoring(config)
+        # Components are built on the first start_session()
+        self._config = config
+        self._initialized = False
+        
+        # Check whether monitoring is configured, enabled and valid
+        self._check_monitoring_config(config)
+        if not self.enabled:
+            self._disable_hot_paths()
     
-    def _initialize_monitoring(self, config: Dict[str, Any]) -> None:
+    def _disable_hot_paths(self) -> None:
         """
-        Initialize monitoring components based on configuration.
+        Rebind the per-stage recording methods to a no-op on this instance.
+        
+        A disabled manager then costs a single call per recording, without the
+        enabled/session checks, try/except setup and debug logging.
+        """
+        for name in _HOT_PATH_METHODS:
+            setattr(self, name, _noop)
+    
+    def _check_monitoring_config(self, config: Dict[str, Any]) -> None:
+        """
+        Enable monitoring if the configuration asks for it and is valid.
         
         Args:
             config: Application configuration dictionary
@@ -58,17 +101,42 @@ class MonitorManager:
             self.logger.info("Monitoring explicitly disabled in configuration")
             return
         
-        self.logger.info("Monitoring is enabled in configuration, initializing components...")
-        
         try:
             # Validate configuration
             validate_monitoring_config(monitoring_config)
-            
+            self.enabled = True
+        except ConfigurationError as e:
+            self.logger.warning(f"Invalid monitoring configuration: {e}")
+            self.logger.info("Continuing without monitoring")
+            self.enabled = False
+        except Exception as e:
+            self.logger.warning(f"Failed to initialize monitoring: {e}")
+            self.logger.info("Continuing without monitoring")
+            self.enabled = False
+    
+    def _initialize_monitoring(self) -> None:
+        """
+        Initialize monitoring components based on configuration.
+        
+        Called once, from the first start_session() of an enabled manager.
+        """
+        self._initialized = True
+        config = self._config
+        monitoring_config = config['monitoring']
+        
+        self.logger.info("Monitoring is enabled in configuration, initializing components...")
+        
+        try:
             # Initialize metrics collector
             self.metrics_collector = MetricsCollector(
                 monitoring_config.get('metrics', {}),
                 self.logger
             )
+            # Older collectors take no dicom_path and have no record_performance_data
+            self._measurements_take_dicom_path = (
+                'dicom_path' in inspect.signature(self.metrics_collector.record_measurements).parameters
+            )
+            self._record_performance_data = getattr(self.metrics_collector, 'record_performance_data', None)
             
             # Initialize FileBackend (Default)
             file_config = monitoring_config.get('backends', {}).get('file', {'enabled': True})
@@ -89,24 +157,31 @@ class MonitorManager:
                 self.mercure_backend = MercureResultBackend(mercure_config, self.logger)
                 self.logger.info("MercureResultBackend initialized")
             
+            # Initialize InfluxDBBackend when an InfluxDB server is configured
+            if 'influxdb' in monitoring_config:
+                influxdb_config = {'enabled': True, **monitoring_config['influxdb']}
+                if influxdb_config.get('enabled', True):
+                    # Imported here: pulls in requests, only needed when InfluxDB is configured
+                    from .backends.influxdb import InfluxDBBackend
+                    self.influxdb_backend = InfluxDBBackend(influxdb_config, self.logger)
+                    self.logger.info("InfluxDBBackend initialized")
+            
             # Enable monitoring if at least one backend is available
-            if self.file_backend or self.mercure_backend:
+            if self.file_backend or self.mercure_backend or self.influxdb_backend:
                 self.enabled = True
                 backends = []
                 if self.file_backend:
                     backends.append("File")
                 if self.mercure_backend:
                     backends.append("Mercure")
+                if self.influxdb_backend:
+                    backends.append("InfluxDB")
                 
                 self.logger.info(f"Monitoring enabled with backends: {', '.join(backends)}")
             else:
                 self.logger.warning("No monitoring backends available - monitoring disabled")
                 self.enabled = False
             
-        except ConfigurationError as e:
-            self.logger.warning(f"Invalid monitoring configuration: {e}")
-            self.logger.info("Continuing without monitoring")
-            self.enabled = False
         except Exception as e:
             self.logger.warning(f"Failed to initialize monitoring: {e}")
             self.logger.info("Continuing without monitoring")
@@ -126,8 +201,14 @@ class MonitorManager:
         if not self.enabled:
             return ""
         
+        if not self._initialized:
+            self._initialize_monitoring()
+            if not self.enabled:
+                self._disable_hot_paths()
+                return ""
+        
         try:
-            session_id = f"{series_id}_{int(time.time())}"
+            session_id = f"{series_id}_{next(self._session_counter)}"
             
             # Initialize session in metrics collector
             if self.metrics_collector:
@@ -137,7 +218,7 @@ class MonitorManager:
             if accession_number:
                 self.logger.info(f"Started monitoring session for accession {accession_number}: {session_id}")
             else:
-                self.logger.debug(f"Started monitoring session: {session_id}")
+                self.logger.debug("Started monitoring session: %s", session_id)
             return session_id
             
         except Exception as e:
@@ -152,8 +233,8 @@ class MonitorManager:
         Args:
             session_id: Session identifier
             stage: Processing stage name (e.g., 'inference', 'measurement')
-            start_time: Stage start timestamp
-            end_time: Stage end timestamp
+            start_time: Stage start time from time.perf_counter() (only the difference is used)
+            end_time: Stage end time from time.perf_counter()
         """
         if not self.enabled or not session_id:
             return
@@ -165,7 +246,7 @@ class MonitorManager:
             if self.metrics_collector:
                 self.metrics_collector.record_timing(session_id, stage, duration)
             
-            self.logger.debug(f"Tracked {stage} timing: {duration:.2f}s")
+            self.logger.debug("Tracked %s timing: %.2fs", stage, duration)
             
         except Exception as e:
             self.logger.debug(f"Failed to track processing time: {e}")
@@ -189,7 +270,7 @@ class MonitorManager:
             if self.metrics_collector:
                 self.metrics_collector.record_custom_metric(session_id, metric_name, value, tags)
             
-            self.logger.debug(f"Recorded metric {metric_name}: {value}")
+            self.logger.debug("Recorded metric %s: %s", metric_name, value)
             
         except Exception as e:
             self.logger.debug(f"Failed to record metric: {e}")
@@ -212,7 +293,7 @@ class MonitorManager:
             if self.metrics_collector:
                 self.metrics_collector.record_model_metrics(session_id, model_name, metrics)
             
-            self.logger.debug(f"Recorded model performance for {model_name}")
+            self.logger.debug("Recorded model performance for %s", model_name)
             
         except Exception as e:
             self.logger.debug(f"Failed to record model performance: {e}")
@@ -232,15 +313,13 @@ class MonitorManager:
         
         try:
             # Record in metrics collector
-            if self.metrics_collector:
-                # Try new method with dicom_path, fallback to old method
-                try:
-                    self.metrics_collector.record_measurements(session_id, measurements, dicom_path)
-                except TypeError:
-                    # Old method signature without dicom_path
-                    self.metrics_collector.record_measurements(session_id, measurements)
+            if self._measurements_take_dicom_path:
+                self.metrics_collector.record_measurements(session_id, measurements, dicom_path)
+            elif self.metrics_collector:
+                # Old method signature without dicom_path
+                self.metrics_collector.record_measurements(session_id, measurements)
             
-            self.logger.debug(f"Recorded {len(measurements)} measurements")
+            self.logger.debug("Recorded %d measurements", len(measurements))
             
         except Exception as e:
             self.logger.debug(f"Failed to record measurements: {e}")
@@ -260,10 +339,10 @@ class MonitorManager:
             
         try:
             # Record in metrics collector if method exists
-            if self.metrics_collector and hasattr(self.metrics_collector, 'record_performance_data'):
-                self.metrics_collector.record_performance_data(session_id, performance_data, dicom_path)
+            if self._record_performance_data:
+                self._record_performance_data(session_id, performance_data, dicom_path)
             
-            self.logger.debug(f"Recorded performance data with {len(performance_data.get('uncertainties', {}))} points")
+            self.logger.debug("Recorded performance data with %d points", len(performance_data.get('uncertainties', {})))
             
         except Exception as e:
             self.logger.debug(f"Failed to record performance data: {e}")
@@ -293,11 +372,14 @@ class MonitorManager:
             if self.mercure_backend and event:
                 self.mercure_backend.record_event(event)
             
+            # 3. Queue the event for the batched InfluxDB write
+            if self.influxdb_backend and event:
+                self.influxdb_backend.record_event(event)
+            
             # Get accession number before cleanup for logging
             accession_number = None
-            if self.metrics_collector and session_id in self.metrics_collector.sessions:
-                session_config = self.metrics_collector.sessions[session_id].get('config', {})
-                accession_number = session_config.get('accession_number')
+            if self.metrics_collector:
+                accession_number = getattr(self.metrics_collector.sessions.get(session_id), 'accession', None)
             
             # Cleanup session data
             if self.metrics_collector:
@@ -7,19 +7,124 @@ Stores results.json in PostgreSQL JSONB format, queryable by study_uid (DICOM St
 
 import os
 import json
+import hashlib
+import time
+import atexit
 import logging
-from typing import Optional, Dict, Any
+import threading
+import weakref
+import importlib.util
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Optional, Dict, Any, List, Tuple, Iterable, Iterator
 from datetime import datetime
 
-try:
-    import psycopg2
-    from psycopg2.extras import Json
-    from psycopg2.pool import SimpleConnectionPool
-except ImportError:
-    psycopg2 = None
+from .backends.base import serialize_json
+
+# psycopg2 is imported on first use; only check that it is installed here
+PSYCOPG2_AVAILABLE = importlib.util.find_spec('psycopg2') is not None
+
+
+def _dumps_jsonb(obj: Any) -> str:
+    """JSONB encoder for psycopg2's Json adapter (orjson when installed, instead of json.dumps)."""
+    return serialize_json(obj).decode('utf-8')
 
 logger = logging.getLogger(__name__)
 
+# ai_results columns written by the client, in the order of the queued row tuples
+RESULT_COLUMNS = """
+        study_uid, study_id, series_id, accession_number, patient_id, patient_name,
+        study_date, study_description, results, measurements,
+        processing_time_seconds, models_used, input_file_path, output_directory,
+        content_hash
+"""
+
+RESULT_PARAM_TYPES = """
+        text, text, text, text, text, text,
+        date, text, jsonb, jsonb,
+        float8, text[], text, text,
+        bytea
+"""
+
+RESULT_PLACEHOLDERS = ', '.join(f"${i}" for i in range(1, 16))
+
+ON_CONFLICT_UPDATE = """
+    ON CONFLICT (study_uid) DO UPDATE SET
+        study_id = EXCLUDED.study_id,
+        results = EXCLUDED.results,
+        measurements = EXCLUDED.measurements,
+        processing_time_seconds = EXCLUDED.processing_time_seconds,
+        models_used = EXCLUDED.models_used,
+        content_hash = EXCLUDED.content_hash,
+        timestamp = NOW()
+    WHERE ai_results.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+"""
+
+# Upsert prepared once per connection, so the server parses and plans it once
+# instead of on every write
+UPSERT_STATEMENT = "ai_results_upsert"
+
+PREPARE_UPSERT_QUERY = f"""
+    PREPARE {UPSERT_STATEMENT} ({RESULT_PARAM_TYPES}) AS
+    INSERT INTO ai_results ({RESULT_COLUMNS})
+    VALUES ({RESULT_PLACEHOLDERS})
+    {ON_CONFLICT_UPDATE}
+"""
+
+# Staging mode: rows go to the UNLOGGED ai_results_staging table (no WAL, no
+# fsync per commit) and are merged into ai_results every merge_interval_s
+STAGING_STATEMENT = "ai_results_stage"
+
+PREPARE_STAGING_QUERY = f"""
+    PREPARE {STAGING_STATEMENT} ({RESULT_PARAM_TYPES}) AS
+    INSERT INTO ai_results_staging ({RESULT_COLUMNS})
+    VALUES ({RESULT_PLACEHOLDERS})
+"""
+
+# Moves staged rows into ai_results in one statement. DELETE ... RETURNING only
+# removes the rows it merges, so rows staged concurrently wait for the next merge.
+# The newest staged row per study wins.
+MERGE_STAGING_QUERY = f"""
+    WITH staged AS (
+        DELETE FROM ai_results_staging RETURNING *
+    )
+    INSERT INTO ai_results ({RESULT_COLUMNS})
+    SELECT DISTINCT ON (study_uid) {RESULT_COLUMNS}
+    FROM staged
+    ORDER BY study_uid, id DESC
+    {ON_CONFLICT_UPDATE}
+    RETURNING study_uid
+"""
+
+# Lookups prepared once on each read connection when it is opened
+LOOKUP_BY_UID_STATEMENT = "ai_results_by_uid"
+LOOKUP_BY_ID_STATEMENT = "ai_results_by_id"
+
+PREPARE_LOOKUPS_QUERY = f"""
+    PREPARE {LOOKUP_BY_UID_STATEMENT} (text) AS
+    SELECT results FROM ai_results WHERE study_uid = $1;
+    PREPARE {LOOKUP_BY_ID_STATEMENT} (text) AS
+    SELECT results, study_uid FROM ai_results WHERE study_id = $1;
+"""
+
+# One EXECUTE per row; flush() sends a whole batch of them in a single round trip.
+# Rows are positional tuples in RESULT_COLUMNS order.
+EXECUTE_PARAMS = f"({', '.join(['%s'] * 15)})"
+EXECUTE_UPSERT_QUERY = f"EXECUTE {UPSERT_STATEMENT} {EXECUTE_PARAMS}"
+EXECUTE_STAGING_QUERY = f"EXECUTE {STAGING_STATEMENT} {EXECUTE_PARAMS}"
+
+# Unprepared forms for a single row on a connection without the prepared
+# statement, where PREPARE would cost an extra round trip that is never amortized
+DIRECT_UPSERT_QUERY = f"""
+    INSERT INTO ai_results ({RESULT_COLUMNS})
+    VALUES {EXECUTE_PARAMS}
+    {ON_CONFLICT_UPDATE}
+"""
+DIRECT_STAGING_QUERY = f"""
+    INSERT INTO ai_results_staging ({RESULT_COLUMNS})
+    VALUES {EXECUTE_PARAMS}
+"""
+
 
 class ResultsDBClient:
     """
@@ -29,53 +134,154 @@ class ResultsDBClient:
         from monitoring import ResultsDBClient
         
         client = ResultsDBClient()
-        client.store_result(study_uid="1.2.3.4.5", results_json={...})
+        written = client.store_result(study_uid="1.2.3.4.5", results_json={...})
+        client.flush()  # optional: pending results are also flushed in the background and on close()
+        written.result()  # True once this row was written, False if its batch failed
         results = client.get_by_study_uid("1.2.3.4.5")
+    
+    The psycopg2 import and the connection pool are created on first database
+    access, so processes that never store or query results pay neither cost.
+    Lookups run on a per-thread autocommit connection, with the study_uid/study_id
+    lookups prepared once per connection; the pool serves the writer.
+    
+    Writes are batched: store_result() queues the row, and queued rows are upserted
+    through a server-side prepared statement, sent in one round trip with a single
+    commit, once batch_size rows are pending, every flush_interval_s seconds, or on
+    flush()/close(). A lone row on a connection that has not prepared the statement
+    is written with a plain INSERT instead, saving the PREPARE round trip.
+    
+    get_by_study_uid() and get_by_study_id() results are cached in memory for
+    cache_ttl_s seconds; storing a study invalidates its cached lookups.
+    
+    Each row carries a content hash of its results.json. Re-storing a study whose
+    results are unchanged is skipped in memory when the last written hash is known,
+    and otherwise leaves the existing row untouched in the database.
+    
+    With use_staging=True, flushed rows are inserted into the UNLOGGED
+    ai_results_staging table and merged into ai_results every merge_interval_s
+    seconds (and on flush_now()/close()). Staged rows are not visible to lookups
+    until merged, and are lost if the database server crashes before the merge.
     """
     
-    def __init__(self, enabled: bool = True):
+    def __init__(
+        self,
+        enabled: bool = True,
+        batch_size: int = 200,
+        flush_interval_s: float = 5.0,
+        cache_size: int = 1024,
+        cache_ttl_s: float = 300.0,
+        use_staging: bool = False,
+        merge_interval_s: float = 30.0
+    ):
         """
         Initialize database client.
         
         Args:
             enabled: If False, all operations are no-ops (for testing/development)
+            batch_size: Number of queued results that triggers an immediate flush
+            flush_interval_s: Interval of the background flush of queued results
+            cache_size: Number of get_by_study_uid/get_by_study_id results kept in memory (0 disables)
+            cache_ttl_s: Seconds a cached result is served before it is re-read
+            use_staging: Write batches to the UNLOGGED staging table and merge them periodically
+            merge_interval_s: Interval of the background staging merge
         """
-        self.enabled = enabled and psycopg2 is not None
+        self.enabled = enabled and PSYCOPG2_AVAILABLE
         self.pool = None
+        self._pool_kwargs: Dict[str, Any] = {}
+        self._pool_lock = threading.Lock()
+        # Pooled connections on which the write statement has been prepared
+        self._prepared_conns: 'weakref.WeakSet' = weakref.WeakSet()
+        
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        # Pending rows keyed by study_uid: a re-stored study replaces its queued row,
+        # so one batch never upserts the same key twice
+        self._pending: Dict[str, Tuple[Any, ...]] = {}
+        # Completion handle per queued study_uid, resolved by the flush that writes it
+        self._pending_writes: Dict[str, Future] = {}
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop_flusher = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._closed = False
+        
+        self.use_staging = use_staging
+        self.merge_interval_s = merge_interval_s
+        self._merger: Optional[threading.Thread] = None
+        if use_staging:
+            self._statement_query, self._execute_query = PREPARE_STAGING_QUERY, EXECUTE_STAGING_QUERY
+            self._direct_query = DIRECT_STAGING_QUERY
+        else:
+            self._statement_query, self._execute_query = PREPARE_UPSERT_QUERY, EXECUTE_UPSERT_QUERY
+            self._direct_query = DIRECT_UPSERT_QUERY
+        
+        # Readers use one autocommit connection per thread, opened outside the pool so
+        # the batched writer never waits behind lookups for a pool slot
+        self._tls = threading.local()
+        self._read_conns: list = []
+        self._read_conns_lock = threading.Lock()
+        
+        # LRU of lookup results: (kind, key) -> (expires_at, study_uid, results).
+        # Returned results are shared; callers must not modify them.
+        self.cache_size = cache_size
+        self.cache_ttl_s = cache_ttl_s
+        self._cache: 'OrderedDict[Tuple[str, str], Tuple[float, str, Any]]' = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # LRU of study_uid -> content hash of the last successfully written results
+        self._stored_hashes: 'OrderedDict[str, bytes]' = OrderedDict()
         
         if not self.enabled:
-            if not psycopg2:
+            if not PSYCOPG2_AVAILABLE:
                 logger.debug("psycopg2 not available - results DB disabled")
             else:
                 logger.debug("Results DB client disabled")
             return
         
-        # Get connection details from environment
-        host = os.getenv("MONITORING_DB_HOST", "172.17.0.1")
-        port = int(os.getenv("MONITORING_DB_PORT", "9042"))
-        dbname = os.getenv("MONITORING_DB_NAME", "monitoring")
-        user = os.getenv("MONITORING_DB_USER", "monitoring")
-        password = os.getenv("MONITORING_DB_PASS", "monitoring123")
+        # Get connection details from environment (the pool is created on first use)
+        self._pool_kwargs = {
+            'host': os.getenv("MONITORING_DB_HOST", "172.17.0.1"),
+            'port': int(os.getenv("MONITORING_DB_PORT", "9042")),
+            'dbname': os.getenv("MONITORING_DB_NAME", "monitoring"),
+            'user': os.getenv("MONITORING_DB_USER", "monitoring"),
+            'password': os.getenv("MONITORING_DB_PASS", "monitoring123"),
+        }
         
-        try:
-            # Create connection pool (min 1, max 5 connections)
-            self.pool = SimpleConnectionPool(
-                1, 5,
-                host=host,
-                port=port,
-                dbname=dbname,
-                user=user,
-                password=password
-            )
-            logger.info(f"Results DB client initialized: {host}:{port}/{dbname}")
-        except Exception as e:
-            logger.warning(f"Failed to initialize Results DB client: {e}")
-            self.enabled = False
-            self.pool = None
+        atexit.register(self.close)
+    
+    def _ensure_pool(self) -> bool:
+        """
+        Import psycopg2 and create the connection pool on first use.
+        
+        Returns:
+            True if the pool is available, False if the client had to be disabled
+        """
+        if self.pool:
+            return True
+        
+        with self._pool_lock:
+            if self.pool:
+                return True
+            if not self.enabled:
+                return False
+            
+            kwargs = self._pool_kwargs
+            try:
+                from psycopg2.pool import ThreadedConnectionPool
+                
+                # Create connection pool (min 1, max 5 connections); thread-safe, since the
+                # flusher and merger threads share it with callers
+                self.pool = ThreadedConnectionPool(1, 5, **kwargs)
+                logger.info(f"Results DB client initialized: {kwargs['host']}:{kwargs['port']}/{kwargs['dbname']}")
+                return True
+            except Exception as e:
+                logger.warning(f"Failed to initialize Results DB client: {e}")
+                self.enabled = False
+                self.pool = None
+                return False
     
     def _get_conn(self):
         """Get a connection from the pool."""
-        if not self.enabled or not self.pool:
+        if not self.enabled or not self._ensure_pool():
             return None
         try:
             return self.pool.getconn()
@@ -83,11 +289,67 @@ class ResultsDBClient:
             logger.error(f"Failed to get DB connection: {e}")
             return None
     
-    def _put_conn(self, conn):
-        """Return a connection to the pool."""
+    def _get_read_conn(self):
+        """Get this thread's autocommit connection for lookups, connecting on first use."""
+        if not self.enabled:
+            return None
+        conn = getattr(self._tls, 'conn', None)
+        if conn is not None and not conn.closed:
+            return conn
+        
+        conn = None
+        try:
+            import psycopg2
+            
+            conn = psycopg2.connect(**self._pool_kwargs)
+            # SELECTs need no transaction: skip the implicit BEGIN/COMMIT round trips
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute(PREPARE_LOOKUPS_QUERY)
+        except Exception as e:
+            logger.error(f"Failed to open DB read connection: {e}")
+            if conn is not None:
+                conn.close()
+            return None
+        
+        self._tls.conn = conn
+        with self._read_conns_lock:
+            self._read_conns.append(conn)
+        return conn
+    
+    def _drop_read_conn(self, conn) -> None:
+        """Close this thread's read connection after a failed lookup; the next lookup reconnects."""
+        self._tls.conn = None
+        with self._read_conns_lock:
+            if conn in self._read_conns:
+                self._read_conns.remove(conn)
+        try:
+            conn.close()
+        except Exception:
+            pass
+    
+    def _rollback_if_needed(self, conn) -> None:
+        """Roll back only if a transaction is open (failures before the first statement leave none)."""
+        try:
+            from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+            
+            if not conn.closed and conn.info.transaction_status != TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+        except Exception as e:
+            logger.debug("Rollback failed: %s", e)
+    
+    def _prepare_statement(self, cur, conn) -> None:
+        """PREPARE the write statement on conn if this session has not done so yet."""
+        if conn in self._prepared_conns:
+            return
+        cur.execute(self._statement_query)
+        self._prepared_conns.add(conn)
+    
+    def _put_conn(self, conn, close: bool = False):
+        """Return a connection to the pool (close=True discards it)."""
         if self.pool and conn:
             try:
-                self.pool.putconn(conn)
+                self.pool.putconn(conn, close=close)
             except Exception as e:
                 logger.error(f"Failed to return DB connection: {e}")
     
@@ -99,9 +361,12 @@ class ResultsDBClient:
         series_id: Optional[str] = None,
         accession_number: Optional[str] = None,
         **metadata
-    ) -> bool:
+    ) -> Optional[Future]:
         """
-        Store a results.json in the database.
+        Queue a results.json for storage in the database.
+        
+        The row is written by the next flush (batch full, background interval,
+        flush() or close()), which may run on the background flusher thread.
         
         Args:
             study_uid: DICOM StudyInstanceUID (required, primary key)
@@ -112,84 +377,245 @@ class ResultsDBClient:
             **metadata: Additional metadata (patient_id, patient_name, etc.)
         
         Returns:
-            True if successful, False otherwise
+            Future resolved with True once the row is written (False if its batch
+            failed), or None if the result was not queued
         """
         if not self.enabled:
-            return False
+            return None
         
         if not study_uid:
             logger.error("store_result: study_uid is required")
-            return False
+            return None
+        
+        from psycopg2.extras import Json
+        
+        # Extract measurements from results if available
+        measurements = None
+        if isinstance(results_json, dict):
+            results_data = results_json.get('results', {})
+            if isinstance(results_data, dict):
+                measurements = results_data.get('measurements', {})
+        
+        # Extract metadata from results_json if not provided
+        metadata_dict = (results_json.get('metadata') or {}) if isinstance(results_json, dict) else {}
+        given = metadata.get
+        stored = metadata_dict.get
+        
+        # Canonical encoding: hashed, and reused as the JSONB payload
+        payload = serialize_json(results_json, sort_keys=True)
+        content_hash = hashlib.blake2b(payload, digest_size=16).digest()
+        if self._is_unchanged(study_uid, content_hash):
+            logger.debug("Results unchanged for study_uid=%s, skipping write", study_uid)
+            written = Future()
+            written.set_result(True)
+            return written
+        results_text = payload.decode('utf-8')
+        
+        # Prepare the row (column order of RESULT_COLUMNS)
+        row = (
+            study_uid,
+            study_id or stored('study_id'),
+            series_id or stored('series_id'),
+            accession_number or stored('accession_number'),
+            given('patient_id') or stored('patient_id'),
+            given('patient_name') or stored('patient_name'),
+            given('study_date') or stored('study_date'),
+            given('study_description') or stored('study_description'),
+            Json(results_json, dumps=lambda _: results_text),  # Store full JSON as JSONB
+            Json(measurements, dumps=_dumps_jsonb) if measurements else None,
+            given('processing_time_seconds') or stored('processing_time_seconds'),
+            given('models_used') or stored('models_used') or [],
+            given('input_file_path') or stored('input_file'),
+            given('output_directory') or stored('output_directory'),
+            content_hash,
+        )
         
+        written = self._enqueue_result(study_uid, row)
+        logger.debug("Queued results for study_uid=%s", study_uid)
+        return written
+    
+    def _is_unchanged(self, study_uid: str, content_hash: bytes) -> bool:
+        """True if content_hash was the last write for study_uid and no other row is queued for it."""
+        with self._cache_lock:
+            if self._stored_hashes.get(study_uid) != content_hash:
+                return False
+        with self._pending_lock:
+            return study_uid not in self._pending
+    
+    def _remember_hashes(self, rows: Iterable[Tuple[Any, ...]]) -> None:
+        """Record the content hashes of successfully written rows."""
+        with self._cache_lock:
+            for row in rows:
+                self._stored_hashes[row[0]] = row[-1]
+                self._stored_hashes.move_to_end(row[0])
+            while len(self._stored_hashes) > self.cache_size:
+                self._stored_hashes.popitem(last=False)
+    
+    def _enqueue_result(self, study_uid: str, row: Tuple[Any, ...]) -> Future:
+        """Queue a prepared row and flush if the batch is full; returns the row's completion handle."""
+        self._cache_invalidate((study_uid,))
+        with self._pending_lock:
+            self._pending[study_uid] = row
+            # A re-stored study replaces its queued row and shares its handle
+            written = self._pending_writes.get(study_uid)
+            if written is None:
+                written = self._pending_writes[study_uid] = Future()
+            batch_full = len(self._pending) >= self.batch_size
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name='results-db-flusher', daemon=True)
+                self._flusher.start()
+            if self.use_staging and self._merger is None:
+                self._merger = threading.Thread(target=self._merge_loop, name='results-db-merger', daemon=True)
+                self._merger.start()
+        
+        if batch_full:
+            self.flush()
+        return written
+    
+    def _flush_loop(self) -> None:
+        """Flush queued results every flush_interval_s seconds until close()."""
+        while not self._stop_flusher.wait(self.flush_interval_s):
+            self.flush()
+    
+    def flush(self) -> bool:
+        """
+        Upsert all queued results in a single transaction.
+        
+        Returns:
+            True if the queue was empty or written successfully, False otherwise
+            (the failed batch is dropped and logged). Rows taken by an earlier
+            flush are not reported here; their store_result() handles are.
+        """
+        with self._flush_lock:
+            with self._pending_lock:
+                if not self._pending:
+                    return True
+                rows = list(self._pending.values())
+                self._pending.clear()
+                writes = list(self._pending_writes.values())
+                self._pending_writes.clear()
+            
+            written = False
+            try:
+                written = self._write_rows(rows)
+            finally:
+                for write in writes:
+                    write.set_result(written)
+            return written
+    
+    def _write_rows(self, rows: List[Tuple[Any, ...]]) -> bool:
+        """Upsert (or stage) rows in one transaction; False if the batch was dropped."""
         conn = self._get_conn()
         if not conn:
+            logger.error(f"Dropping {len(rows)} queued results: no DB connection")
             return False
         
+        discard = False
         try:
-            cur = conn.cursor()
-            
-            # Extract measurements from results if available
-            measurements = None
-            if isinstance(results_json, dict):
-                results_data = results_json.get('results', {})
-                if isinstance(results_data, dict):
-                    measurements = results_data.get('measurements', {})
+            from psycopg2.extras import execute_batch
             
-            # Extract metadata from results_json if not provided
-            metadata_dict = results_json.get('metadata', {}) if isinstance(results_json, dict) else {}
-            
-            # Prepare data
-            data = {
-                'study_uid': study_uid,
-                'study_id': study_id or metadata_dict.get('study_id'),
-                'series_id': series_id or metadata_dict.get('series_id'),
-                'accession_number': accession_number or metadata_dict.get('accession_number'),
-                'patient_id': metadata.get('patient_id') or metadata_dict.get('patient_id'),
-                'patient_name': metadata.get('patient_name') or metadata_dict.get('patient_name'),
-                'study_date': metadata.get('study_date') or metadata_dict.get('study_date'),
-                'study_description': metadata.get('study_description') or metadata_dict.get('study_description'),
-                'results': Json(results_json),  # Store full JSON as JSONB
-                'measurements': Json(measurements) if measurements else None,
-                'processing_time_seconds': metadata.get('processing_time_seconds') or metadata_dict.get('processing_time_seconds'),
-                'models_used': metadata.get('models_used') or metadata_dict.get('models_used') or [],
-                'input_file_path': metadata.get('input_file_path') or metadata_dict.get('input_file'),
-                'output_directory': metadata.get('output_directory') or metadata_dict.get('output_directory'),
-            }
+            cur = conn.cursor()
+            # Insert or update (ON CONFLICT handles re-processing), or stage the rows
+            if len(rows) == 1 and conn not in self._prepared_conns:
+                cur.execute(self._direct_query, rows[0])
+            else:
+                self._prepare_statement(cur, conn)
+                execute_batch(cur, self._execute_query, rows, page_size=len(rows))
+            conn.commit()
+            cur.close()
+            # Drop lookups cached while these rows were queued
+            self._cache_invalidate(row[0] for row in rows)
+            self._remember_hashes(rows)
             
-            # Insert or update (ON CONFLICT handles re-processing)
-            query = """
-                INSERT INTO ai_results (
-                    study_uid, study_id, series_id, accession_number, patient_id, patient_name,
-                    study_date, study_description, results, measurements,
-                    processing_time_seconds, models_used, input_file_path, output_directory
-                ) VALUES (
-                    %(study_uid)s, %(study_id)s, %(series_id)s, %(accession_number)s, %(patient_id)s, %(patient_name)s,
-                    %(study_date)s, %(study_description)s, %(results)s, %(measurements)s,
-                    %(processing_time_seconds)s, %(models_used)s, %(input_file_path)s, %(output_directory)s
-                )
-                ON CONFLICT (study_uid) DO UPDATE SET
-                    study_id = EXCLUDED.study_id,
-                    results = EXCLUDED.results,
-                    measurements = EXCLUDED.measurements,
-                    processing_time_seconds = EXCLUDED.processing_time_seconds,
-                    models_used = EXCLUDED.models_used,
-                    timestamp = NOW()
-            """
+            logger.info("Stored results for %d studies", len(rows))
+            return True
             
-            cur.execute(query, data)
+        except Exception as e:
+            logger.error("Failed to store results for %d studies: %s", len(rows), e)
+            self._rollback_if_needed(conn)
+            # Discard the connection: its prepared-statement state is unknown after a failure
+            self._prepared_conns.discard(conn)
+            discard = True
+            return False
+        finally:
+            self._put_conn(conn, close=discard)
+    
+    def _merge_loop(self) -> None:
+        """Merge staged results every merge_interval_s seconds until close()."""
+        while not self._stop_flusher.wait(self.merge_interval_s):
+            self.merge_staged()
+    
+    def merge_staged(self) -> bool:
+        """
+        Move staged results into ai_results in a single transaction (staging mode only).
+        
+        Returns:
+            True if nothing needed merging or the merge succeeded, False otherwise
+        """
+        if not self.use_staging:
+            return True
+        
+        conn = self._get_conn()
+        if not conn:
+            return False
+        
+        try:
+            cur = conn.cursor()
+            cur.execute(MERGE_STAGING_QUERY)
+            merged = [row[0] for row in cur.fetchall()]
             conn.commit()
             cur.close()
             
-            logger.info(f"Stored results for study_uid={study_uid}")
+            if merged:
+                self._cache_invalidate(merged)
+                logger.info("Merged staged results for %d studies", len(merged))
             return True
             
         except Exception as e:
-            logger.error(f"Failed to store results for study_uid={study_uid}: {e}")
-            conn.rollback()
+            logger.error("Failed to merge staged results: %s", e)
+            self._rollback_if_needed(conn)
             return False
         finally:
             self._put_conn(conn)
     
+    def flush_now(self) -> bool:
+        """
+        Write all queued results through to ai_results.
+        
+        Flushes the queue and, in staging mode, merges the staging table.
+        """
+        flushed = self.flush()
+        return self.merge_staged() and flushed
+    
+    def _cache_get(self, key: Tuple[str, str]) -> Optional[Any]:
+        """Return a cached, unexpired lookup result or None."""
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return entry[2]
+    
+    def _cache_put(self, key: Tuple[str, str], study_uid: str, results: Any) -> None:
+        """Cache a lookup result, evicting the least recently used entries."""
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[key] = (time.monotonic() + self.cache_ttl_s, study_uid, results)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+    
+    def _cache_invalidate(self, study_uids: Iterable[str]) -> None:
+        """Drop every cached lookup that resolved to one of the given studies."""
+        study_uids = set(study_uids)
+        with self._cache_lock:
+            for key in [key for key, entry in self._cache.items() if entry[1] in study_uids]:
+                del self._cache[key]
+    
     def get_by_study_uid(self, study_uid: str) -> Optional[Dict[str, Any]]:
         """
         Retrieve results by study_uid (DICOM StudyInstanceUID).
@@ -203,28 +629,29 @@ class ResultsDBClient:
         if not self.enabled:
             return None
         
-        conn = self._get_conn()
+        cached = self._cache_get(('uid', study_uid))
+        if cached is not None:
+            return cached
+        
+        conn = self._get_read_conn()
         if not conn:
             return None
         
         try:
             cur = conn.cursor()
-            cur.execute(
-                "SELECT results FROM ai_results WHERE study_uid = %s",
-                (study_uid,)
-            )
+            cur.execute(f"EXECUTE {LOOKUP_BY_UID_STATEMENT} (%s)", (study_uid,))
             row = cur.fetchone()
             cur.close()
             
             if row:
+                self._cache_put(('uid', study_uid), study_uid, row[0])
                 return row[0]  # results is JSONB, psycopg2 returns as dict
             return None
             
         except Exception as e:
             logger.error(f"Failed to retrieve results for study_uid={study_uid}: {e}")
+            self._drop_read_conn(conn)
             return None
-        finally:
-            self._put_conn(conn)
     
     def get_by_study_id(self, study_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -239,28 +666,29 @@ class ResultsDBClient:
         if not self.enabled:
             return None
         
-        conn = self._get_conn()
+        cached = self._cache_get(('id', study_id))
+        if cached is not None:
+            return cached
+        
+        conn = self._get_read_conn()
         if not conn:
             return None
         
         try:
             cur = conn.cursor()
-            cur.execute(
-                "SELECT results FROM ai_results WHERE study_id = %s",
-                (study_id,)
-            )
+            cur.execute(f"EXECUTE {LOOKUP_BY_ID_STATEMENT} (%s)", (study_id,))
             row = cur.fetchone()
             cur.close()
             
             if row:
+                self._cache_put(('id', study_id), row[1], row[0])
                 return row[0]  # results is JSONB, psycopg2 returns as dict
             return None
             
         except Exception as e:
             logger.error(f"Failed to retrieve results for study_id={study_id}: {e}")
+            self._drop_read_conn(conn)
             return None
-        finally:
-            self._put_conn(conn)
     
     def get_by_accession(self, accession_number: str) -> list:
         """
@@ -270,34 +698,69 @@ class ResultsDBClient:
             accession_number: DICOM AccessionNumber
         
         Returns:
-            List of results dictionaries
+            List of results dictionaries, newest first
         """
-        if not self.enabled:
-            return []
+        return list(self.iter_by_accession(accession_number))
+    
+    def iter_by_accession(self, accession_number: str) -> Iterator[Dict[str, Any]]:
+        """
+        Stream all results for an accession number, newest first.
+        
+        Rows are read through a server-side cursor itersize at a time, so memory
+        stays bounded however many re-processed results match. A pooled
+        connection is held until the iterator is exhausted or closed.
         
+        Args:
+            accession_number: DICOM AccessionNumber
+        
+        Yields:
+            Results dictionaries
+        """
         conn = self._get_conn()
         if not conn:
-            return []
+            return
         
+        discard = False
         try:
-            cur = conn.cursor()
+            # Named cursor = server-side; needs the pooled (non-autocommit) connection
+            cur = conn.cursor(name=f"acc_{os.urandom(8).hex()}")
+            cur.itersize = 100
             cur.execute(
                 "SELECT results FROM ai_results WHERE accession_number = %s ORDER BY timestamp DESC",
                 (accession_number,)
             )
-            rows = cur.fetchall()
+            yield from (row[0] for row in cur)
             cur.close()
             
-            return [row[0] for row in rows]  # Extract results from tuples
-            
         except Exception as e:
             logger.error(f"Failed to retrieve results for accession={accession_number}: {e}")
-            return []
+            discard = True
         finally:
-            self._put_conn(conn)
+            # Ends the read transaction (and the cursor with it)
+            self._rollback_if_needed(conn)
+            self._put_conn(conn, close=discard)
     
     def close(self):
-        """Close the connection pool."""
+        """
+        Flush queued results, close the read connections and the connection pool.
+        
+        Safe to call more than once; later calls (including the one at exit) do nothing.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        self._stop_flusher.set()
+        if self.enabled:
+            self.flush_now()
+        with self._read_conns_lock:
+            read_conns, self._read_conns = self._read_conns, []
+        for conn in read_conns:
+            try:
+                conn.close()
+            except Exception:
+                pass
         if self.pool:
             self.pool.closeall()
+            self.pool = None
             logger.debug("Results DB connection pool closed")
@@ -373,6 +373,33 @@ def persist_results(output_dir: Path, series_id: str, accession_number: str, log
         logger.error(f"Failed to persist results: {e}")
 
 
+# ResultsDBClient shared by every store in this process (created on first use), so
+# its connection and prepared statement are reused; it flushes and closes at exit
+_results_db_client = None
+
+
+def _get_results_db_client(results_db_config: dict, logger: logging.Logger):
+    """Return the process-wide ResultsDBClient, or None if it is not available."""
+    global _results_db_client
+    if _results_db_client is None:
+        # Import results_db_client from monitoring submodule
+        try:
+            from monitoring import ResultsDBClient
+        except ImportError:
+            logger.warning("ResultsDBClient not available from monitoring module, skipping database storage")
+            return None
+        
+        # Initialize client with config
+        os.environ["MONITORING_DB_HOST"] = results_db_config.get("host", "172.17.0.1")
+        os.environ["MONITORING_DB_PORT"] = str(results_db_config.get("port", 9042))
+        os.environ["MONITORING_DB_NAME"] = results_db_config.get("database", "monitoring")
+        os.environ["MONITORING_DB_USER"] = results_db_config.get("user", "monitoring")
+        os.environ["MONITORING_DB_PASS"] = results_db_config.get("password", "monitoring123")
+        
+        _results_db_client = ResultsDBClient(enabled=True)
+    return _results_db_client
+
+
 def store_results_to_db(
     results: dict,
     study_uid: str,
@@ -407,22 +434,10 @@ def store_results_to_db(
         return
     
     try:
-        # Import results_db_client from monitoring submodule
-        try:
-            from monitoring import ResultsDBClient
-        except ImportError:
-            logger.warning("ResultsDBClient not available from monitoring module, skipping database storage")
+        client = _get_results_db_client(results_db_config, logger)
+        if client is None:
             return
         
-        # Initialize client with config
-        os.environ["MONITORING_DB_HOST"] = results_db_config.get("host", "172.17.0.1")
-        os.environ["MONITORING_DB_PORT"] = str(results_db_config.get("port", 9042))
-        os.environ["MONITORING_DB_NAME"] = results_db_config.get("database", "monitoring")
-        os.environ["MONITORING_DB_USER"] = results_db_config.get("user", "monitoring")
-        os.environ["MONITORING_DB_PASS"] = results_db_config.get("password", "monitoring123")
-        
-        client = ResultsDBClient(enabled=True)
-        
         if not client.enabled:
             logger.warning("Results DB client not enabled, skipping database storage")
             return
@@ -450,8 +465,8 @@ def store_results_to_db(
             study_date = None
             study_description = None
         
-        # Store in database
-        success = client.store_result(
+        # Queue the result and write it now (store_result batches by default)
+        written = client.store_result(
             study_uid=study_uid,
             results_json=results_json,
             series_id=series_id,
@@ -465,14 +480,15 @@ def store_results_to_db(
             input_file_path=str(dicom_path),
             output_directory=str(output_dir)
         )
+        # flush_now() only reports the rows it wrote itself; the handle also covers a
+        # write the background flusher took first (it is resolved once flush_now() returns)
+        success = written is not None and client.flush_now() and written.result()
         
         if success:
             logger.info(f"Successfully stored results in database for study_uid={study_uid}")
         else:
             logger.warning(f"Failed to store results in database for study_uid={study_uid}")
         
-        client.close()
-        
     except Exception as e:
         logger.error(f"Error storing results in database: {e}")
         logger.debug("Full error:", exc_info=True)
@@ -817,10 +833,10 @@ def main():
                     else:
                         logger.info(f"Processing series {series_id}: {dicom_path.name} (highest matrix size={best_matrix_size}, dimensions={best_dimensions[0]}x{best_dimensions[1]})")
                 
-                # Track processing time
-                start_time = time.time()
+                # Track processing time (monotonic clock: only used for durations)
+                start_time = time.perf_counter()
                 results = process_image(dicom_path, args.output_dir, config, logger)
-                end_time = time.time()
+                end_time = time.perf_counter()
                 processing_time = end_time - start_time
                 
                 # Save comprehensive results to JSON
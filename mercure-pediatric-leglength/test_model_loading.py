@@ -10,35 +10,254 @@ automatically detects whether a checkpoint contains:
 The detection is based on the 'detection_head_type' field in the checkpoint metadata.
 """
 
+import argparse
+import functools
+import io
+import json
 import torch
 import logging
-from leglength.detector import LegLengthDetector, LegLengthDetectorWithKeypointHead
+import os
+import pickle
+import resource
+import tempfile
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from export_tensorrt import build_engine, export_onnx
+from leglength.detector import LegLengthDetector
+from leglength.model_loader import detection_head_type_from_name
+from leglength.tensorrt_detector import TensorRTKeypointDetector
+from leglength.training_models import KeypointDetector, KeypointDetectorWithSpecializedHead
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt='%H:%M:%S'
 )
 logger = logging.getLogger(__name__)
 
+# Registry models loaded concurrently in Test 1
+_LOAD_WORKERS = 4
+
+# registry.json, parsed once per process by _load_registry()
+_REGISTRY_PATH = Path(__file__).resolve().with_name('registry.json')
+_REGISTRY = None
+# (model name, backbone, detection head type guessed from the name) per registry model
+_MODEL_META = []
+# Downloaded checkpoints (models/<name>.pth, see LegLengthDetector.get_model_path)
+_CHECKPOINT_DIR = Path(__file__).resolve().with_name('models')
+# --export-trt output, kept out of models/ so the loader never picks it up
+_TRT_EXPORT_DIR = Path(tempfile.gettempdir()) / 'leglength_trt_test'
+
+# Allow TF32 for FP32 matmuls on Ampere+ (the registry models' backbones are
+# compiled and warmed up by load_checkpoint itself)
+torch.set_float32_matmul_precision('high')
+
+# --precision choices -> autocast dtype for predict/predict_batch (None runs FP32)
+_PRECISIONS = {'fp32': None, 'bf16': torch.bfloat16, 'fp16': torch.float16}
+
+
+@functools.lru_cache(maxsize=4)
+def _cached_torch_load(model_path: str) -> dict:
+    """Deserialize a checkpoint once per process; later tests reuse the same dict.
+    
+    mmap=True pages tensor data in on access, so reading only the metadata
+    does not read the weights. weights_only=True uses the restricted unpickler;
+    legacy checkpoints that pickled other Python objects fall back to the full one.
+    """
+    try:
+        return torch.load(model_path, map_location='cpu', mmap=True, weights_only=True)
+    except pickle.UnpicklingError as e:
+        logger.warning(f"{model_path} needs the full unpickler (weights_only=False): {e}")
+        return torch.load(model_path, map_location='cpu', mmap=True, weights_only=False)
+
+
+def _load_registry() -> dict:
+    """Parse registry.json once and precompute each model's name-derived metadata."""
+    global _REGISTRY, _MODEL_META
+    if _REGISTRY is None:
+        data = _REGISTRY_PATH.read_bytes()
+        _REGISTRY = orjson.loads(data) if orjson is not None else json.loads(data)
+        _MODEL_META = [
+            (
+                name,
+                LegLengthDetector._extract_backbone_name(name),
+                detection_head_type_from_name(name)
+            )
+            for name in _REGISTRY
+        ]
+    return _REGISTRY
+
+
+def _checkpoints_on_disk() -> set:
+    """Names of the models whose checkpoint has been downloaded, from one directory scan."""
+    try:
+        with os.scandir(_CHECKPOINT_DIR) as entries:
+            return {entry.name[:-len('.pth')] for entry in entries if entry.name.endswith('.pth') and entry.is_file()}
+    except FileNotFoundError:
+        return set()
+
+
+def _load_registry_model(model_name: str, lazy: bool = False, precision: str = 'bf16'):
+    """Load one registry model, reusing its cached checkpoint.
+    
+    predict and predict_batch are bound to the requested autocast dtype so the
+    precisions can be compared; bf16 falls back to fp16 on GPUs without bf16 support.
+    """
+    checkpoint = _cached_torch_load(LegLengthDetector.get_model_path(model_name))
+    detector = LegLengthDetector.load_checkpoint(model_name, checkpoint=checkpoint, lazy=lazy)
+    if isinstance(detector, TensorRTKeypointDetector):
+        # TensorRT engines have their precision fixed at export time
+        return detector
+    
+    dtype = _PRECISIONS[precision]
+    if dtype is torch.bfloat16 and detector.device.type == 'cuda' and not torch.cuda.is_bf16_supported():
+        logger.warning(f"bf16 is not supported on {detector.device}, using fp16 for {model_name}")
+        dtype = torch.float16
+    detector.predict = functools.partial(detector.predict, dtype=dtype)
+    detector.predict_batch = functools.partial(detector.predict_batch, dtype=dtype)
+    detector.inference_dtype = dtype
+    return detector
+
+
+def _log_kp(buf: io.StringIO, detector: KeypointDetectorWithSpecializedHead, model_name: str) -> None:
+    """Describe a detector with the specialized keypoint head."""
+    buf.write("✓ Loaded as: KeypointDetectorWithSpecializedHead (Faster R-CNN with keypoint head)\n")
+    buf.write(f"  - Model name: {model_name}\n")
+    buf.write(f"  - Backbone: {detector.backbone_name}\n")
+    buf.write(f"  - Num classes: {detector.num_classes}\n")
+    buf.write(f"  - Num keypoints: {detector.num_keypoints}\n")
+
+
+def _log_std(buf: io.StringIO, detector: KeypointDetector, model_name: str) -> None:
+    """Describe a standard Faster R-CNN detector."""
+    buf.write("✓ Loaded as: KeypointDetector (Standard Faster R-CNN)\n")
+    buf.write(f"  - Model name: {model_name}\n")
+    buf.write(f"  - Backbone: {detector.backbone}\n")
+    buf.write(f"  - Num classes: {detector.num_classes}\n")
+
+
+def _log_trt(buf: io.StringIO, detector: TensorRTKeypointDetector, model_name: str) -> None:
+    """Describe a detector backed by an exported TensorRT engine."""
+    buf.write("✓ Loaded as: TensorRTKeypointDetector (exported TensorRT engine)\n")
+    buf.write(f"  - Model name: {model_name}\n")
+    buf.write(f"  - ONNX model: {detector.onnx_path}\n")
+    buf.write(f"  - Engine precision: {detector.precision}\n")
+
+
+# Detector type returned by load_checkpoint -> report writer, checked in order (first match wins)
+_TYPE_LOGGERS = [
+    (KeypointDetectorWithSpecializedHead, _log_kp),
+    (KeypointDetector, _log_std),
+    (TensorRTKeypointDetector, _log_trt),
+]
+
+
+def _report_model_load(model_name: str, load) -> None:
+    """Log the outcome of loading one registry model.
+    
+    A model's report lines are collected and logged as one record, so they stay
+    together and cost one pass through the logging machinery.
+    
+    Args:
+        model_name: Model name as it appears in registry.json
+        load: Callable returning the loaded detector (a load function or Future.result)
+    """
+    buf = io.StringIO()
+    buf.write(f"\nLoading model: {model_name}\n")
+    buf.write("-" * 40 + "\n")
+    try:
+        # Load checkpoint - automatic detection will determine model type
+        detector = load()
+        
+        # Check the type of detector loaded
+        for cls, log_fn in _TYPE_LOGGERS:
+            if isinstance(detector, cls):
+                log_fn(buf, detector, model_name)
+                break
+        
+        # Verify model is on correct device
+        buf.write(f"  - Device: {detector.device}\n")
+        buf.write(f"  - Backbone compiled: {getattr(detector, 'compiled', False)}\n")
+        buf.write(f"  - Inference dtype: {getattr(detector, 'inference_dtype', None) or 'float32'}\n")
+        
+        # Test inference capability (without actual image)
+        buf.write("  - Model ready for inference: ✓")
+        logger.info("%s", buf.getvalue())
+        
+    except FileNotFoundError as e:
+        logger.info("%s", buf.getvalue().rstrip("\n"))
+        logger.warning(f"✗ Model checkpoint not found: {model_name}")
+        logger.warning(f"  Run 'python download_models.py' to download models")
+    except Exception as e:
+        logger.info("%s", buf.getvalue().rstrip("\n"))
+        logger.error(f"✗ Error loading model {model_name}: {e}")
+        traceback.print_exc()
+
+
+def _tensorrt_available() -> bool:
+    """Whether onnxruntime is installed with the TensorRT execution provider."""
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        return False
+    return 'TensorrtExecutionProvider' in ort.get_available_providers()
+
+
+def _export_tensorrt(model_names, precision: str = 'fp32') -> None:
+    """Export each model to ONNX and build its TensorRT engine.
+    
+    Exports and engines go to _TRT_EXPORT_DIR, not models/, so this test never
+    changes what production loads (use export_tensorrt.py for deployment). Nodes
+    without a TensorRT-enabled onnxruntime only export the ONNX files.
+    """
+    if not torch.cuda.is_available():
+        logger.warning("CUDA is not available, skipping TensorRT export")
+        return
+    
+    build = _tensorrt_available()
+    if not build:
+        logger.warning("onnxruntime with TensorrtExecutionProvider is not available, exporting ONNX only")
+    _TRT_EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+    
+    for model_name in model_names:
+        start = time.perf_counter()
+        try:
+            onnx_path = export_onnx(model_name, str(_TRT_EXPORT_DIR / f"{model_name}.onnx"))
+            if build:
+                build_engine(onnx_path, precision)
+            logger.info(f"✓ Exported {model_name}{' and built its TensorRT engine' if build else ''} "
+                        f"in {time.perf_counter() - start:.1f}s")
+        except Exception as e:
+            logger.error(f"✗ Error exporting model {model_name}: {e}")
+
 
-def test_model_loading():
-    """Test loading models with automatic detection."""
+def test_model_loading(serial: bool = False, lazy: bool = False, precision: str = 'bf16',
+                       export_trt: bool = False):
+    """Test loading models with automatic detection.
+    
+    Args:
+        serial: Load the registry models one at a time instead of on a thread pool
+        lazy: Build models on the meta device and assign the memory-mapped weights
+        precision: Autocast precision bound to each detector's predict ('fp32', 'bf16' or 'fp16')
+        export_trt: Export the loaded models to ONNX and build their TensorRT engines
+    """
     
     logger.info("=" * 80)
     logger.info("Testing Automatic Model Type Detection")
     logger.info("=" * 80)
     
     # Load registry to get available models
-    import json
-    import os
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    registry_path = os.path.join(current_dir, 'registry.json')
-    
     try:
-        with open(registry_path, 'r') as f:
-            registry = json.load(f)
-        available_models = list(registry.keys())
+        _load_registry()
+        available_models = [name for name, _, _ in _MODEL_META]
         logger.info(f"\nFound {len(available_models)} models in registry:")
         for model in available_models:
             logger.info(f"  - {model}")
@@ -46,45 +265,43 @@ def test_model_loading():
         logger.error(f"Could not load registry: {e}")
         available_models = []
     
+    # Skip models that have not been downloaded instead of failing each load
+    on_disk = _checkpoints_on_disk()
+    missing_models = [model for model in available_models if model not in on_disk]
+    if missing_models:
+        logger.warning(f"\nSkipping {len(missing_models)} models without a checkpoint in {_CHECKPOINT_DIR}: "
+                       f"{', '.join(missing_models)}")
+        logger.warning("  Run 'python download_models.py' to download models")
+        available_models = [model for model in available_models if model in on_disk]
+    logger.info(f"{len(available_models)} models loadable from disk")
+    
     # Test 1: Load all models from registry
     logger.info("\n" + "=" * 80)
     logger.info("Test 1: Loading Models from Registry")
     logger.info("=" * 80)
     
-    for model_name in available_models:
-        try:
-            logger.info(f"\nLoading model: {model_name}")
-            logger.info("-" * 40)
-            
-            # Load checkpoint - automatic detection will determine model type
-            detector = LegLengthDetector.load_checkpoint(model_name)
-            
-            # Check the type of detector loaded
-            if isinstance(detector, LegLengthDetectorWithKeypointHead):
-                logger.info(f"✓ Loaded as: LegLengthDetectorWithKeypointHead")
-                logger.info(f"  - Model name: {model_name}")
-                logger.info(f"  - Backbone: {detector.backbone_name}")
-                logger.info(f"  - Num classes: {detector.num_classes}")
-                logger.info(f"  - Num keypoints: {detector.num_keypoints}")
-            elif isinstance(detector, LegLengthDetector):
-                logger.info(f"✓ Loaded as: LegLengthDetector (Standard Faster R-CNN)")
-                logger.info(f"  - Model name: {model_name}")
-                logger.info(f"  - Backbone: {detector.backbone_name}")
-                logger.info(f"  - Num classes: {detector.num_classes}")
-            
-            # Verify model is on correct device
-            logger.info(f"  - Device: {detector.device}")
-            
-            # Test inference capability (without actual image)
-            logger.info(f"  - Model ready for inference: ✓")
-            
-        except FileNotFoundError as e:
-            logger.warning(f"✗ Model checkpoint not found: {model_name}")
-            logger.warning(f"  Run 'python download_models.py' to download models")
-        except Exception as e:
-            logger.error(f"✗ Error loading model {model_name}: {e}")
-            import traceback
-            traceback.print_exc()
+    if serial:
+        for model_name in available_models:
+            _report_model_load(model_name, functools.partial(_load_registry_model, model_name, lazy, precision))
+    elif available_models:
+        # Checkpoint reads overlap across threads; results are logged from this
+        # thread as they complete so each model's lines stay together
+        with ThreadPoolExecutor(max_workers=min(_LOAD_WORKERS, len(available_models))) as executor:
+            futures = {
+                executor.submit(_load_registry_model, model_name, lazy, precision): model_name for model_name in available_models
+            }
+            for future in as_completed(futures):
+                _report_model_load(futures[future], future.result)
+    
+    # ru_maxrss is in KiB on Linux
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    logger.info(f"\nPeak RSS after loading ({'lazy' if lazy else 'eager'} load): {peak_rss_mb:.0f} MB")
+    
+    if export_trt and available_models:
+        logger.info("\n" + "=" * 80)
+        logger.info("Exporting Models to ONNX / TensorRT")
+        logger.info("=" * 80)
+        _export_tensorrt(available_models)
     
     # Test 2: Demonstrate metadata extraction and backbone name extraction
     logger.info("\n" + "=" * 80)
@@ -93,19 +310,20 @@ def test_model_loading():
     
     if available_models:
         # Test with first available model
-        model_name = available_models[0]
+        model_name, backbone_name, name_head_type = next(
+            meta for meta in _MODEL_META if meta[0] == available_models[0]
+        )
         try:
             logger.info(f"\nExamining model: {model_name}")
             logger.info("-" * 40)
             
             # Show backbone extraction
-            backbone_name = LegLengthDetector._extract_backbone_name(model_name)
             logger.info(f"Model name: {model_name}")
             logger.info(f"Extracted backbone: {backbone_name}")
             
             # Load checkpoint and show metadata
             model_path = LegLengthDetector.get_model_path(model_name)
-            checkpoint = torch.load(model_path, map_location='cpu')
+            checkpoint = _cached_torch_load(model_path)
             
             if 'metadata' in checkpoint:
                 metadata = checkpoint['metadata']
@@ -120,7 +338,7 @@ def test_model_loading():
             
             if detection_head_type is None:
                 # Auto-detect from model name
-                if any(suffix in model_name for suffix in ['_kp_head', '_keypoint_head']):
+                if name_head_type == 'faster_rcnn_keypoint_head':
                     logger.info(f"\nNo detection_head_type in metadata")
                     logger.info(f"Auto-detected from name '{model_name}': faster_rcnn_keypoint_head")
                     logger.info("→ Will load as: LegLengthDetectorWithKeypointHead")
@@ -162,15 +380,13 @@ def test_model_loading():
     logger.info("=" * 80)
 
 
-def demonstrate_checkpoint_structure():
-    """Demonstrate the expected checkpoint structure."""
-    
-    logger.info("\n" + "=" * 80)
-    logger.info("Expected Checkpoint Structure")
-    logger.info("=" * 80)
-    
-    logger.info("\nFor Standard Faster R-CNN:")
-    logger.info("""
+# Documentation shown after the tests, each emitted as a single log record
+_CHECKPOINT_STRUCTURE = "\n".join([
+    "\n" + "=" * 80,
+    "Expected Checkpoint Structure",
+    "=" * 80,
+    "\nFor Standard Faster R-CNN:",
+    """
 {
     'model_state_dict': <model weights>,
     'optimizer_state_dict': <optimizer state>,
@@ -183,10 +399,9 @@ def demonstrate_checkpoint_structure():
         'preprocessing_config': {...}
     }
 }
-    """)
-    
-    logger.info("\nFor Faster R-CNN with Keypoint Head:")
-    logger.info("""
+    """,
+    "\nFor Faster R-CNN with Keypoint Head:",
+    """
 {
     'model_state_dict': <model weights>,
     'optimizer_state_dict': <optimizer state>,
@@ -200,18 +415,15 @@ def demonstrate_checkpoint_structure():
         'preprocessing_config': {...}
     }
 }
-    """)
-
+    """,
+])
 
-def show_usage_examples():
-    """Show usage examples."""
-    
-    logger.info("\n" + "=" * 80)
-    logger.info("Usage Examples")
-    logger.info("=" * 80)
-    
-    logger.info("\nExample 1: Load any model (automatic detection)")
-    logger.info("""
+_USAGE_EXAMPLES = "\n".join([
+    "\n" + "=" * 80,
+    "Usage Examples",
+    "=" * 80,
+    "\nExample 1: Load any model (automatic detection)",
+    """
 from leglength.detector import LegLengthDetector
 
 # Load standard Faster R-CNN model
@@ -222,10 +434,9 @@ detector_kp = LegLengthDetector.load_checkpoint('resnet50_kp_head')
 
 # Use for inference (same interface for both)
 predictions = detector.predict(image, confidence_threshold=0.5)
-    """)
-    
-    logger.info("\nExample 2: Check model type after loading")
-    logger.info("""
+    """,
+    "\nExample 2: Check model type after loading",
+    """
 from leglength.detector import LegLengthDetector, LegLengthDetectorWithKeypointHead
 
 detector = LegLengthDetector.load_checkpoint('my_model')
@@ -234,10 +445,9 @@ if isinstance(detector, LegLengthDetectorWithKeypointHead):
     print("Loaded model with specialized keypoint head")
 elif isinstance(detector, LegLengthDetector):
     print("Loaded standard Faster R-CNN model")
-    """)
-    
-    logger.info("\nExample 3: Integration with existing inference pipeline")
-    logger.info("""
+    """,
+    "\nExample 3: Integration with existing inference pipeline",
+    """
 # Your existing code works without changes!
 from leglength.detector import LegLengthDetector
 from leglength.processor import ImageProcessor
@@ -253,14 +463,36 @@ predictions = detector.predict(image, confidence_threshold=0.5)
 # Convert boxes back to original space
 boxes = torch.tensor(predictions['boxes'])
 boxes = preprocessor.translate_boxes_to_original(boxes)
-    """)
+    """,
+])
+
+
+def demonstrate_checkpoint_structure():
+    """Demonstrate the expected checkpoint structure."""
+    logger.info(_CHECKPOINT_STRUCTURE)
+
+
+def show_usage_examples():
+    """Show usage examples."""
+    logger.info(_USAGE_EXAMPLES)
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Test automatic model type detection')
+    parser.add_argument('--serial', action='store_true', help='Load registry models one at a time (for debugging)')
+    parser.add_argument('--lazy-load', action='store_true',
+                        help='Build models on the meta device and assign memory-mapped weights (compare peak RSS)')
+    parser.add_argument('--precision', choices=sorted(_PRECISIONS), default='bf16',
+                        help='Autocast precision for inference on CUDA (default: bf16)')
+    parser.add_argument('--export-trt', action='store_true',
+                        help='Export loaded models to ONNX and build TensorRT engines in a temp directory (GPU only)')
+    args = parser.parse_args()
+    
     logger.info("Starting Model Loading Tests\n")
     
     # Run tests
-    test_model_loading()
+    test_model_loading(serial=args.serial, lazy=args.lazy_load, precision=args.precision,
+                       export_trt=args.export_trt)
     
     # Show documentation
     demonstrate_checkpoint_structure()
@@ -25,9 +25,15 @@ CREATE TABLE IF NOT EXISTS ai_results (
     
     -- File paths (for reference)
     input_file_path TEXT,
-    output_directory TEXT
+    output_directory TEXT,
+    
+    -- BLAKE2b-128 of the canonical results.json; unchanged re-runs skip the update
+    content_hash BYTEA
 );
 
+-- Databases created before content_hash existed
+ALTER TABLE ai_results ADD COLUMN IF NOT EXISTS content_hash BYTEA;
+
 -- Unique index on study_uid (allows ON CONFLICT updates)
 CREATE UNIQUE INDEX IF NOT EXISTS idx_ai_results_study_uid ON ai_results(study_uid);
 
@@ -42,9 +48,16 @@ CREATE INDEX IF NOT EXISTS idx_ai_results_patient_id ON ai_results(patient_id);
 CREATE INDEX IF NOT EXISTS idx_ai_results_results_gin ON ai_results USING GIN (results);
 CREATE INDEX IF NOT EXISTS idx_ai_results_measurements_gin ON ai_results USING GIN (measurements);
 
+-- Write-optimized staging table (ResultsDBClient use_staging=True): UNLOGGED, so
+-- inserts skip the WAL, and no indexes. Rows are merged into ai_results
+-- periodically; unmerged rows are lost if the server crashes.
+CREATE UNLOGGED TABLE IF NOT EXISTS ai_results_staging (LIKE ai_results INCLUDING DEFAULTS);
+ALTER TABLE ai_results_staging ADD COLUMN IF NOT EXISTS content_hash BYTEA;
+
 -- Comments
 COMMENT ON TABLE ai_results IS 'Stores complete AI inference results (results.json) from leg length analysis';
 COMMENT ON COLUMN ai_results.study_uid IS 'DICOM StudyInstanceUID - primary lookup key';
 COMMENT ON COLUMN ai_results.study_id IS 'Orthanc study ID (if available)';
 COMMENT ON COLUMN ai_results.results IS 'Complete results.json stored as JSONB';
 COMMENT ON COLUMN ai_results.measurements IS 'Extracted measurements for easy querying';
+COMMENT ON TABLE ai_results_staging IS 'Unlogged write buffer merged into ai_results by the results client';
@@ -2,19 +2,25 @@
 Lightweight Graphite client for emitting metrics.
 
 Uses the same approach as Mercure - simple, async, fire-and-forget.
+Metrics are queued in memory and shipped in batches over Carbon's pickle protocol.
 """
 
 import os
+import time
+import atexit
+import pickle
+import socket
+import struct
 import logging
-from typing import Optional
-
-try:
-    import graphyte
-except ImportError:
-    graphyte = None
+import threading
+from collections import deque
+from typing import Dict, Optional
 
 logger = logging.getLogger(__name__)
 
+# Plaintext lines per UDP datagram are kept under a typical Ethernet MTU
+_UDP_MAX_DATAGRAM = 1400
+
 
 class GraphiteClient:
     """
@@ -24,36 +30,83 @@ class GraphiteClient:
         client = GraphiteClient()
         client.send("inference.started", 1)
         client.send("inference.duration_ms", 1234.5)
+    
+    send() only appends to an in-memory queue. A background thread ships the
+    queue to Carbon's pickle receiver every flush_interval_s seconds, or as soon
+    as batch_size metrics are pending, with one TCP write per batch. If Graphite
+    is unreachable the batch is dropped; the queue keeps at most max_queued
+    metrics (oldest dropped first).
+    
+    protocol='udp' sends the batches as plaintext lines over a non-blocking UDP
+    socket instead (GRAPHITE_UDP_PORT, default GRAPHITE_PORT), so even the
+    flush thread never waits on a slow or stalled collector; datagrams that
+    cannot be sent immediately are dropped. Carbon must have its UDP listener
+    (ENABLE_UDP_LISTENER) turned on.
     """
     
-    def __init__(self, prefix: str = "leglength", enabled: bool = True):
+    def __init__(
+        self,
+        prefix: str = "leglength",
+        enabled: bool = True,
+        flush_interval_s: float = 1.0,
+        batch_size: int = 512,
+        max_queued: int = 50000,
+        protocol: str = "pickle"
+    ):
         """
         Initialize Graphite client.
         
         Args:
             prefix: Metric prefix (default: "leglength")
             enabled: If False, all sends are no-ops (for testing/development)
+            flush_interval_s: Interval of the background flush
+            batch_size: Queued metrics that trigger an early flush (and max points per write)
+            max_queued: Upper bound of the in-memory queue
+            protocol: 'pickle' (TCP, default) or 'udp' (fire-and-forget plaintext)
         """
+        if protocol not in ("pickle", "udp"):
+            raise ValueError(f"Unsupported Graphite protocol '{protocol}'. Supported: pickle, udp")
         self.prefix = prefix
-        self.enabled = enabled and graphyte is not None
+        self.enabled = enabled
+        self.flush_interval_s = flush_interval_s
+        self.batch_size = batch_size
+        self.protocol = protocol
+        self._queue: deque = deque(maxlen=max_queued)
+        self._sock: Optional[socket.socket] = None
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        # Checked once: the flush path skips its debug calls entirely unless enabled
+        self._debug_enabled = logger.isEnabledFor(logging.DEBUG)
         
         if not self.enabled:
-            if not graphyte:
-                logger.debug("graphyte not available - Graphite metrics disabled")
-            else:
-                logger.debug("Graphite client disabled")
+            logger.debug("Graphite client disabled")
             return
         
         # Get Graphite connection details from environment
         host = os.getenv("GRAPHITE_HOST", "172.17.0.1")
-        port = int(os.getenv("GRAPHITE_PORT", "9038"))
-        
-        try:
-            graphyte.init(host, port=port, prefix=prefix)
-            logger.info(f"Graphite client initialized: {host}:{port} (prefix: {prefix})")
-        except Exception as e:
-            logger.warning(f"Failed to initialize Graphite client: {e}")
-            self.enabled = False
+        if protocol == "udp":
+            port = int(os.getenv("GRAPHITE_UDP_PORT", os.getenv("GRAPHITE_PORT", "9038")))
+        else:
+            port = int(os.getenv("GRAPHITE_PICKLE_PORT", "9039"))
+        self._address = (host, port)
+        
+        if protocol == "udp":
+            try:
+                self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                self._sock.setblocking(False)
+                self._sock.connect(self._address)
+            except OSError as e:
+                logger.warning(f"Failed to initialize Graphite client: {e}")
+                self._close_socket()
+                self.enabled = False
+                return
+        
+        self._flusher = threading.Thread(target=self._flush_loop, name='graphite-flusher', daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+        logger.info("Graphite client initialized: %s:%s/%s (prefix: %s)", host, port, protocol, prefix)
     
     def send(self, metric: str, value: float, timestamp: Optional[float] = None) -> None:
         """
@@ -72,12 +125,107 @@ class GraphiteClient:
         if not self.enabled:
             return
         
-        try:
-            graphyte.send(metric, value, timestamp=timestamp)
-            logger.debug(f"Sent metric: {self.prefix}.{metric} = {value}")
-        except Exception as e:
-            # Don't crash on metric send failures - metrics are best-effort
-            logger.debug(f"Failed to send metric {metric}: {e}")
+        self._queue.append((f"{self.prefix}.{metric}", (timestamp or time.time(), value)))
+        if len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+    
+    def send_many(self, metrics: Dict[str, float], timestamp: Optional[float] = None) -> None:
+        """
+        Send several metrics that share a timestamp (e.g. all measurements of a study).
+        
+        The points are queued together and go out in the same flush.
+        
+        Args:
+            metrics: Metric name (without prefix) -> value
+            timestamp: Optional Unix timestamp (default: now)
+        
+        Example:
+            client.send_many({
+                "measurements.left_femur_cm": 45.2,
+                "measurements.right_femur_cm": 45.6,
+            })
+        """
+        if not self.enabled:
+            return
+        
+        point_time = timestamp or time.time()
+        prefix = self.prefix
+        self._queue.extend((f"{prefix}.{metric}", (point_time, value)) for metric, value in metrics.items())
+        if len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+    
+    def _flush_loop(self) -> None:
+        """Flush the queue every flush_interval_s seconds, or early when a batch is full."""
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval_s)
+            self._wakeup.clear()
+            self.flush()
+    
+    def flush(self) -> None:
+        """Send all queued metrics, batch_size points per pickle message (or UDP datagrams)."""
+        with self._flush_lock:
+            while self._queue:
+                batch = []
+                while self._queue and len(batch) < self.batch_size:
+                    batch.append(self._queue.popleft())
+                
+                try:
+                    if self.protocol == "udp":
+                        self._send_udp(batch)
+                    else:
+                        self._send_pickle(batch)
+                except OSError as e:
+                    # Don't crash on metric send failures - metrics are best-effort
+                    if self.protocol != "udp":
+                        self._close_socket()
+                    if self._debug_enabled:
+                        logger.debug("Failed to send %d metrics: %s", len(batch), e)
+                    return
+                
+                if self._debug_enabled:
+                    logger.debug("Sent %d metrics", len(batch))
+    
+    def _send_pickle(self, batch: list) -> None:
+        """Write one length-prefixed pickle message, connecting if needed."""
+        payload = pickle.dumps(batch, protocol=2)
+        if self._sock is None:
+            self._sock = socket.create_connection(self._address, timeout=2.0)
+        self._sock.sendall(struct.pack('!L', len(payload)) + payload)
+    
+    def _send_udp(self, batch: list) -> None:
+        """Send the batch as plaintext lines, packed into MTU-sized datagrams.
+        
+        The socket is non-blocking: a full send buffer raises BlockingIOError
+        and the rest of the batch is dropped.
+        """
+        datagram = b""
+        for path, (timestamp, value) in batch:
+            line = f"{path} {value} {int(timestamp)}\n".encode()
+            if datagram and len(datagram) + len(line) > _UDP_MAX_DATAGRAM:
+                self._sock.send(datagram)
+                datagram = b""
+            datagram += line
+        if datagram:
+            self._sock.send(datagram)
+    
+    def _close_socket(self) -> None:
+        """Close the Carbon connection; the next flush reconnects."""
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+    
+    def close(self) -> None:
+        """Stop the background flush, send what is queued and close the connection."""
+        self._stop.set()
+        self._wakeup.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=5.0)
+        if self.enabled:
+            self.flush()
+        self._close_socket()
     
     def increment(self, metric: str, value: int = 1) -> None:
         """
@@ -14,12 +14,40 @@ import json
 import argparse
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Add parent directory to path to import results_db_client
 sys.path.insert(0, str(Path(__file__).parent))
 
 from results_db_client import ResultsDBClient
 
 
+def _dumps(obj, pretty: bool) -> bytes:
+    """Serialize a result to UTF-8 JSON (orjson when installed, stdlib json otherwise)."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_INDENT_2 if pretty else 0)
+    return json.dumps(obj, indent=2 if pretty else None, default=str).encode('utf-8')
+
+
+def _write_results(results, pretty: bool) -> None:
+    """Write results to stdout in one buffered write instead of a print per result."""
+    parts = []
+    for i, result in enumerate(results, 1):
+        if len(results) > 1:
+            parts.append(f"--- Result {i} ---\n".encode('utf-8'))
+        parts.append(_dumps(result, pretty))
+        parts.append(b"\n")
+    
+    # Flush pending text output first so it stays ahead of the raw bytes
+    sys.stdout.flush()
+    out = sys.stdout.buffer
+    out.writelines(parts)
+    out.flush()
+
+
 def main():
     parser = argparse.ArgumentParser(description='Query AI results from monitoring database')
     parser.add_argument('study_uid', nargs='?', help='DICOM StudyInstanceUID to query')
@@ -49,31 +77,19 @@ def main():
                 print(f"No results found for accession: {args.accession}")
                 sys.exit(1)
             print(f"Found {len(results)} result(s) for accession: {args.accession}\n")
-            for i, result in enumerate(results, 1):
-                if len(results) > 1:
-                    print(f"--- Result {i} ---")
-                if args.pretty:
-                    print(json.dumps(result, indent=2))
-                else:
-                    print(json.dumps(result))
+            _write_results(results, args.pretty)
         elif args.study_id:
             result = client.get_by_study_id(args.study_id)
             if not result:
                 print(f"No results found for study_id: {args.study_id}")
                 sys.exit(1)
-            if args.pretty:
-                print(json.dumps(result, indent=2))
-            else:
-                print(json.dumps(result))
+            _write_results([result], args.pretty)
         elif args.study_uid:
             result = client.get_by_study_uid(args.study_uid)
             if not result:
                 print(f"No results found for study_uid: {args.study_uid}")
                 sys.exit(1)
-            if args.pretty:
-                print(json.dumps(result, indent=2))
-            else:
-                print(json.dumps(result))
+            _write_results([result], args.pretty)
         else:
             parser.print_help()
             sys.exit(1)
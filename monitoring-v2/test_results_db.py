@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 import os
 import sys
+import time
 from pathlib import Path
 
 # Add mercure-pediatric-leglength to path
@@ -15,6 +16,29 @@ os.environ["MONITORING_DB_NAME"] = "monitoring"
 os.environ["MONITORING_DB_USER"] = "monitoring"
 os.environ["MONITORING_DB_PASS"] = "monitoring123"
 
+# Accession of the synthetic rows written by the steady-state test (deleted afterwards)
+STEADY_STATE_ACCESSION = "TEST_STEADY_STATE_TMP"
+
+
+def delete_accession(accession_number):
+    """Delete all ai_results rows for an accession number; returns the number deleted."""
+    import psycopg2
+    
+    conn = psycopg2.connect(
+        host=os.environ["MONITORING_DB_HOST"],
+        port=int(os.environ["MONITORING_DB_PORT"]),
+        dbname=os.environ["MONITORING_DB_NAME"],
+        user=os.environ["MONITORING_DB_USER"],
+        password=os.environ["MONITORING_DB_PASS"]
+    )
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("DELETE FROM ai_results WHERE accession_number = %s", (accession_number,))
+            return cur.rowcount
+    finally:
+        conn.close()
+
+
 # Test data
 test_results = {
     "results": {
@@ -46,7 +70,7 @@ if client.enabled:
         patient_id="TEST_PATIENT",
         patient_name="Test Patient",
         processing_time_seconds=2.5
-    )
+    ) and client.flush_now()
     
     if success:
         print("✅ Successfully stored test result")
@@ -58,6 +82,34 @@ if client.enabled:
             print(f"   Measurements: {retrieved.get('results', {}).get('measurements', {})}")
         else:
             print("❌ Failed to retrieve result")
+        
+        # Steady state: pooled connections with prepared statements, no cold connect.
+        # The synthetic rows use their own accession and are deleted afterwards.
+        n = 100
+        try:
+            start = time.perf_counter()
+            for i in range(n):
+                client.store_result(
+                    study_uid=f"1.2.3.4.5.6.7.8.9.0.{i}",
+                    results_json=test_results,
+                    accession_number=STEADY_STATE_ACCESSION
+                )
+            stored = client.flush_now()
+            store_ms = (time.perf_counter() - start) * 1000
+            
+            start = time.perf_counter()
+            found = sum(client.get_by_study_uid(f"1.2.3.4.5.6.7.8.9.0.{i}") is not None for i in range(n))
+            lookup_ms = (time.perf_counter() - start) * 1000
+            
+            if stored and found == n:
+                print(f"✅ Stored {n} results in {store_ms:.1f} ms, looked them up in {lookup_ms:.1f} ms "
+                      f"({lookup_ms / n:.2f} ms/lookup)")
+            else:
+                print(f"❌ Steady-state test failed (stored: {stored}, found {found}/{n})")
+        finally:
+            client.flush_now()
+            deleted = delete_accession(STEADY_STATE_ACCESSION)
+            print(f"🧹 Deleted {deleted} steady-state test results")
     else:
         print("❌ Failed to store result")
     
@@ -30,7 +30,9 @@ import os
 import threading
 import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from requests.adapters import HTTPAdapter
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 import psycopg2
@@ -67,6 +69,65 @@ ORTHANC_PASS = os.environ.get('ORTHANC_PASS', 'helloaide123')
 # Job poller settings
 JOB_POLL_INTERVAL = int(os.environ.get('JOB_POLL_INTERVAL', '10'))  # seconds
 
+# Orthanc REST API used by /workflows to drop studies deleted from Orthanc
+# Use 172.17.0.1 (Docker host gateway on Linux) to reach Orthanc API
+ORTHANC_API_URL = os.environ.get('ORTHANC_API_URL', 'http://172.17.0.1:9011')
+ORTHANC_CHECK_WORKERS = 16
+ORTHANC_CHECK_TTL = 60  # seconds a study's existence check is reused
+ORTHANC_CHECK_CACHE_SIZE = 4096
+
+# Keep-alive session shared by the existence checks (one pooled connection per worker)
+ORTHANC_SESSION = requests.Session()
+ORTHANC_SESSION.auth = (os.environ.get('ORTHANC_USERNAME', ''), os.environ.get('ORTHANC_PASSWORD', ''))
+ORTHANC_SESSION.mount(ORTHANC_API_URL, HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=0))
+
+# study_id -> (exists, checked_at)
+_study_exists_cache = {}
+_study_exists_lock = threading.Lock()
+
+
+def _orthanc_study_exists(study_id):
+    """Check whether a study is still in Orthanc.
+    
+    Returns False only for a 404; None if Orthanc could not be reached.
+    """
+    try:
+        resp = ORTHANC_SESSION.get(f"{ORTHANC_API_URL}/studies/{study_id}", timeout=2)
+        return resp.status_code != 404
+    except requests.RequestException:
+        return None
+
+
+def orthanc_studies_exist(study_ids):
+    """Check which studies still exist in Orthanc, concurrently and with a TTL cache.
+    
+    Returns a dict of study_id -> True/False; studies whose check failed
+    (Orthanc not reachable) are left out and not cached.
+    """
+    now = time.time()
+    result = {}
+    with _study_exists_lock:
+        for study_id in study_ids:
+            cached = _study_exists_cache.get(study_id)
+            if cached and now - cached[1] < ORTHANC_CHECK_TTL:
+                result[study_id] = cached[0]
+    
+    to_check = [study_id for study_id in dict.fromkeys(study_ids) if study_id not in result]
+    if not to_check:
+        return result
+    
+    with ThreadPoolExecutor(max_workers=min(ORTHANC_CHECK_WORKERS, len(to_check))) as executor:
+        checked = dict(zip(to_check, executor.map(_orthanc_study_exists, to_check)))
+    
+    with _study_exists_lock:
+        if len(_study_exists_cache) > ORTHANC_CHECK_CACHE_SIZE:
+            _study_exists_cache.clear()
+        for study_id, exists in checked.items():
+            if exists is not None:
+                _study_exists_cache[study_id] = (exists, now)
+                result[study_id] = exists
+    return result
+
 
 def get_db():
     """Get connection to our workflow tracking PostgreSQL database.
@@ -807,27 +868,15 @@ def get_workflows():
     cur.close()
     conn.close()
     
+    # Check all studies against Orthanc in one concurrent pass
+    study_exists = orthanc_studies_exist([w['study_id'] for w in workflows])
+    
     # Convert to pipeline format and filter out deleted studies
     result = []
     for w in workflows:
-        # Check if study still exists in Orthanc
-        # Use 172.17.0.1 (Docker host gateway on Linux) to reach Orthanc API
-        orthanc_api_url = os.environ.get('ORTHANC_API_URL', 'http://172.17.0.1:9011')
-        try:
-            resp = requests.get(
-                f"{orthanc_api_url}/studies/{w['study_id']}",
-                timeout=2,
-                auth=(
-                    os.environ.get('ORTHANC_USERNAME', ''),
-                    os.environ.get('ORTHANC_PASSWORD', '')
-                )
-            )
-            if resp.status_code == 404:
-                # Study deleted from Orthanc, skip it
-                continue
-        except requests.RequestException:
-            # Orthanc not reachable, include the workflow anyway
-            pass
+        # Study deleted from Orthanc, skip it (unreachable Orthanc: include it anyway)
+        if study_exists.get(w['study_id']) is False:
+            continue
         
         # Determine current stage and status
         status_text = "Unknown"
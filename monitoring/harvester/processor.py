@@ -20,10 +20,11 @@ class Harvester:
         self.data_path = Path(data_path)
         self.interval = interval
         self.processed_files = set() # TODO: Persist this state (e.g., sqlite or a simple tracking file)
+        self.log_offsets: Dict[Path, int] = {} # Bytes already consumed from each append-only .ndjson log
         
     def scan_files(self) -> List[Path]:
         """
-        Recursively find all .json files in the data path.
+        Recursively find all .json event files and .ndjson event logs in the data path.
         Returns files sorted by modification time (oldest first).
         Ignores 'ai_results' directory.
         """
@@ -38,13 +39,34 @@ class Harvester:
                 dirs.remove('ai_results')
                 
             for filename in filenames:
-                if filename.endswith('.json'):
+                if filename.endswith(('.json', '.ndjson')):
                     files.append(Path(root) / filename)
         
         # Sort by mtime to process in order
         files.sort(key=lambda p: p.stat().st_mtime)
         return files
 
+    def calculate_metrics(self, event: Dict[str, Any], file_path: Path) -> Dict[str, Any]:
+        """
+        Apply all registered calculators to one event.
+        """
+        # Metadata for context
+        result = {
+            'meta_session_id': event.get('metadata', {}).get('session_id'),
+            'meta_timestamp': event.get('metadata', {}).get('timestamp'),
+            'meta_source_file': str(file_path)
+        }
+        
+        # Run all calculators
+        for calculator in CALCULATORS:
+            try:
+                metrics = calculator(event)
+                result.update(metrics)
+            except Exception as e:
+                logger.error(f"Calculator {calculator.__name__} failed for {file_path}: {e}")
+                
+        return result
+
     def process_event(self, file_path: Path) -> Dict[str, Any]:
         """
         Read an event file and apply all registered calculators.
@@ -52,37 +74,53 @@ class Harvester:
         try:
             with open(file_path, 'r') as f:
                 event = json.load(f)
-                
-            # Metadata for context
-            result = {
-                'meta_session_id': event.get('metadata', {}).get('session_id'),
-                'meta_timestamp': event.get('metadata', {}).get('timestamp'),
-                'meta_source_file': str(file_path)
-            }
-            
-            # Run all calculators
-            for calculator in CALCULATORS:
-                try:
-                    metrics = calculator(event)
-                    result.update(metrics)
-                except Exception as e:
-                    logger.error(f"Calculator {calculator.__name__} failed for {file_path}: {e}")
-                    
-            return result
+            return self.calculate_metrics(event, file_path)
             
         except Exception as e:
             logger.error(f"Failed to process file {file_path}: {e}")
             return {}
 
+    def process_event_log(self, file_path: Path) -> List[Dict[str, Any]]:
+        """
+        Read the events appended to an NDJSON log since the last pass.
+        A trailing line without a newline is still being written and is left for the next pass.
+        """
+        results = []
+        offset = self.log_offsets.get(file_path, 0)
+        try:
+            with open(file_path, 'rb') as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break
+                    offset += len(line)
+                    if not line.strip():
+                        continue
+                    try:
+                        results.append(self.calculate_metrics(json.loads(line), file_path))
+                    except Exception as e:
+                        logger.error(f"Failed to parse event in {file_path}: {e}")
+        except Exception as e:
+            logger.error(f"Failed to process log {file_path}: {e}")
+        
+        self.log_offsets[file_path] = offset
+        return results
+
     def run_once(self):
         """Run a single pass over all files."""
         logger.info(f"Scanning {self.data_path}...")
         files = self.scan_files()
         new_files = [f for f in files if f not in self.processed_files]
         
-        logger.info(f"Found {len(new_files)} new events.")
+        logger.info(f"Found {len(new_files)} new event files.")
         
         for file_path in new_files:
+            if file_path.suffix == '.ndjson':
+                # Append-only logs are re-read incrementally on every pass
+                for metrics in self.process_event_log(file_path):
+                    self.emit_metrics(metrics)
+                continue
+            
             metrics = self.process_event(file_path)
             if metrics:
                 self.emit_metrics(metrics)